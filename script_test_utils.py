@@ -0,0 +1,95 @@
+"""
+Shared helpers for the root-level test scripts.
+
+Provides the async HTTP client factory used by the API test scripts and a
+stdout proxy that keeps the output of checks running concurrently (on
+asyncio tasks or worker threads) from interleaving.
+"""
+
+import asyncio
+import contextlib
+import io
+import sys
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+import httpx
+
+try:
+    import h2  # noqa: F401 - enables HTTP/2 in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+def create_async_client(base_url: str, timeout: float = 30) -> httpx.AsyncClient:
+    """Create an async JSON client for base_url (HTTP/2 when h2 is installed)."""
+    return httpx.AsyncClient(
+        base_url=base_url,
+        http2=HTTP2_AVAILABLE,
+        timeout=timeout,
+        headers={"Content-Type": "application/json"}
+    )
+
+
+def run_with_client(check: Callable[[httpx.AsyncClient], Awaitable[Any]], base_url: str) -> Any:
+    """Run a single async check on its own client."""
+    async def _run():
+        async with create_async_client(base_url) as client:
+            return await check(client)
+    return asyncio.run(_run())
+
+
+class BufferedOutput(io.TextIOBase):
+    """
+    stdout proxy that buffers writes made inside capture().
+
+    The active buffer lives in a ContextVar, so each asyncio task and each
+    worker thread writes to its own buffer; writes outside capture() go
+    straight to the target stream.
+    """
+
+    def __init__(self, target):
+        self.target = target
+        self._buffer: ContextVar[Optional[io.StringIO]] = ContextVar("buffer", default=None)
+
+    def write(self, text: str) -> int:
+        buffer = self._buffer.get()
+        return (buffer if buffer is not None else self.target).write(text)
+
+    def capture(self, check: Callable[..., Any], *args) -> Tuple[Any, str]:
+        """Call check(*args) and return (result, everything it printed).
+
+        An exception raised by the check is returned as the result, so one
+        failing check does not stop the others.
+        """
+        buffer = io.StringIO()
+        token = self._buffer.set(buffer)
+        try:
+            return check(*args), buffer.getvalue()
+        except Exception as e:
+            return e, buffer.getvalue()
+        finally:
+            self._buffer.reset(token)
+
+    async def capture_async(self, check: Callable[..., Awaitable[Any]], *args) -> Tuple[Any, str]:
+        """Await check(*args) and return (result, everything it printed)."""
+        buffer = io.StringIO()
+        token = self._buffer.set(buffer)
+        try:
+            return await check(*args), buffer.getvalue()
+        except Exception as e:
+            return e, buffer.getvalue()
+        finally:
+            self._buffer.reset(token)
+
+
+@contextlib.contextmanager
+def buffered_stdout():
+    """Install a BufferedOutput as sys.stdout for the duration of the block."""
+    output = BufferedOutput(sys.stdout)
+    sys.stdout = output
+    try:
+        yield output
+    finally:
+        sys.stdout = output.target
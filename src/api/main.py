@@ -22,7 +22,8 @@ from src.api.middleware import (
     RateLimitMiddleware, 
     CacheMiddleware,
     PerformanceMonitoringMiddleware,
-    SecurityMiddleware
+    SecurityMiddleware,
+    ZstdRequestDecompressionMiddleware
 )
 
 # Configure logging
@@ -62,6 +63,7 @@ app.add_middleware(PerformanceMonitoringMiddleware)
 app.add_middleware(CacheMiddleware, cache_ttl=300)  # 5 minutes cache
 app.add_middleware(RateLimitMiddleware, calls_per_minute=100, calls_per_hour=5000)
 app.add_middleware(APILoggingMiddleware)
+app.add_middleware(ZstdRequestDecompressionMiddleware)
 
 # Store performance monitor reference for metrics endpoint
 performance_monitor = None
@@ -5,6 +5,7 @@ This module provides advanced middleware for logging, error handling,
 rate limiting, and performance monitoring.
 """
 
+import io
 import time
 import json
 import uuid
@@ -39,6 +40,18 @@ except ImportError:
                 response = await call_next(request)
                 return response
 
+# zstd request bodies are only accepted when zstandard is installed
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# Upper bound on a decompressed zstd request body, guarding against
+# decompression bombs
+MAX_DECOMPRESSED_BODY_BYTES = 10 * 1024 * 1024
+DECOMPRESSION_CHUNK_BYTES = 64 * 1024
+
 logger = logging.getLogger(__name__)
 
 
@@ -351,3 +364,115 @@ class SecurityMiddleware(BaseHTTPMiddleware):
         response.headers["Content-Security-Policy"] = "default-src 'self'"
         
         return response
+
+
+class ZstdRequestDecompressionMiddleware:
+    """
+    ASGI middleware that decompresses request bodies sent with
+    Content-Encoding: zstd.
+    
+    The decompressed size is bounded by ``max_body_size``: bodies that expand
+    past it are rejected with 413 before the application sees them, and
+    malformed zstd frames are rejected with 400. Implemented at the ASGI level
+    because BaseHTTPMiddleware cannot rewrite the request stream.
+    """
+    
+    def __init__(self, app, max_body_size: int = MAX_DECOMPRESSED_BODY_BYTES):
+        self.app = app
+        self.max_body_size = max_body_size
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        encoding = dict(scope["headers"]).get(b"content-encoding", b"").strip().lower()
+        if encoding != b"zstd":
+            await self.app(scope, receive, send)
+            return
+        
+        if not ZSTD_AVAILABLE:
+            response = JSONResponse(
+                status_code=415,
+                content={
+                    "error": "Unsupported content encoding",
+                    "message": "zstd request bodies are not supported by this server"
+                }
+            )
+            await response(scope, receive, send)
+            return
+        
+        # Read the compressed body first so an oversized or corrupt payload
+        # can still be answered with a proper error response.
+        compressed = bytearray()
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] != "http.request":
+                return
+            compressed.extend(message.get("body", b""))
+            more_body = message.get("more_body", False)
+            if len(compressed) > self.max_body_size:
+                await self._reject_too_large(scope, receive, send)
+                return
+        
+        try:
+            body = self._decompress(bytes(compressed))
+        except zstandard.ZstdError as exc:
+            response = JSONResponse(
+                status_code=400,
+                content={
+                    "error": "Invalid request body",
+                    "message": f"Malformed zstd request body: {exc}"
+                }
+            )
+            await response(scope, receive, send)
+            return
+        
+        if body is None:
+            await self._reject_too_large(scope, receive, send)
+            return
+        
+        body_sent = False
+        
+        async def receive_decompressed():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+        
+        # The decompressed body has a different length and no encoding
+        headers = [
+            (name, value) for name, value in scope["headers"]
+            if name not in (b"content-encoding", b"content-length")
+        ]
+        headers.append((b"content-length", str(len(body)).encode("latin-1")))
+        await self.app(dict(scope, headers=headers), receive_decompressed, send)
+    
+    def _decompress(self, data: bytes):
+        """Decompress ``data``, returning None once it exceeds ``max_body_size``."""
+        reader = zstandard.ZstdDecompressor().stream_reader(
+            io.BytesIO(data), read_across_frames=True
+        )
+        chunks = []
+        total = 0
+        while True:
+            chunk = reader.read(DECOMPRESSION_CHUNK_BYTES)
+            if not chunk:
+                break
+            total += len(chunk)
+            if total > self.max_body_size:
+                return None
+            chunks.append(chunk)
+        return b"".join(chunks)
+    
+    async def _reject_too_large(self, scope, receive, send):
+        response = JSONResponse(
+            status_code=413,
+            content={
+                "error": "Request body too large",
+                "message": f"Decompressed request body exceeds {self.max_body_size} bytes"
+            }
+        )
+        await response(scope, receive, send)
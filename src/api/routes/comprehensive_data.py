@@ -95,6 +95,14 @@ class ComprehensiveDataResponse(BaseModel):
     data_received_at: datetime = Field(..., description="Data receipt timestamp")
     next_collection_time: Optional[datetime] = Field(None, description="Next recommended collection")
 
+class ComprehensiveBatchResponse(BaseModel):
+    success: bool = Field(..., description="Request success status")
+    total_uploads: int = Field(..., description="Number of payloads in the batch")
+    successful_uploads: int = Field(..., description="Number of payloads processed successfully")
+    failed_uploads: int = Field(..., description="Number of payloads that failed processing")
+    results: List[Union[ComprehensiveDataResponse, Dict[str, Any]]] = Field(..., description="Per-user results or error information")
+    processing_time_ms: int = Field(..., description="Total batch processing time in milliseconds")
+
 # Comprehensive Data Processor
 class ComprehensiveDataProcessor:
     def __init__(self):
@@ -412,6 +420,65 @@ async def upload_comprehensive_data(
             }
         )
 
+@router.post("/upload:batch", response_model=ComprehensiveBatchResponse)
+async def upload_comprehensive_data_batch(
+    data: List[ComprehensiveDataRequest],
+    background_tasks: BackgroundTasks
+):
+    """
+    Upload comprehensive data for many users in a single request
+    
+    Each payload is processed exactly as in /upload; a failure for one user
+    is reported in its result slot without failing the rest of the batch.
+    """
+    start_time = datetime.now()
+    results = []
+    successful_count = 0
+    failed_count = 0
+    
+    for i, item in enumerate(data):
+        item_start = datetime.now()
+        try:
+            risk_assessment = await processor.process_comprehensive_data(item)
+            
+            background_tasks.add_task(
+                process_comprehensive_data_background,
+                item.user_id,
+                item
+            )
+            
+            results.append(ComprehensiveDataResponse(
+                success=True,
+                message="Comprehensive data processed successfully",
+                risk_assessment=risk_assessment,
+                processing_time_ms=int((datetime.now() - item_start).total_seconds() * 1000),
+                data_received_at=item_start,
+                next_collection_time=None
+            ))
+            successful_count += 1
+            
+        except Exception as e:
+            logger.error(f"Error processing comprehensive data for user {item.user_id}: {str(e)}")
+            results.append({
+                "error": str(e),
+                "upload_index": i,
+                "user_id": item.user_id
+            })
+            failed_count += 1
+    
+    processing_time = int((datetime.now() - start_time).total_seconds() * 1000)
+    logger.info(f"Comprehensive batch processed: {successful_count} successful, "
+               f"{failed_count} failed in {processing_time}ms")
+    
+    return ComprehensiveBatchResponse(
+        success=failed_count == 0,
+        total_uploads=len(data),
+        successful_uploads=successful_count,
+        failed_uploads=failed_count,
+        results=results,
+        processing_time_ms=processing_time
+    )
+
 @router.get("/risk-assessment/{user_id}")
 async def get_latest_risk_assessment(user_id: str):
     """Get the latest risk assessment for a user"""
@@ -8,7 +8,7 @@ and coarse location data.
 
 from pydantic import BaseModel, Field, validator
 from typing import Optional, Dict, Any, List
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
 
 
@@ -26,7 +26,15 @@ class NetworkType(str, Enum):
     UNKNOWN = "unknown"
 
 
-class DeviceInfo(BaseModel):
+class _FrozenModel(BaseModel):
+    """Base for nested device payload sections, which are read-only once validated."""
+    
+    class Config:
+        """Pydantic model configuration."""
+        frozen = True
+
+
+class DeviceInfo(_FrozenModel):
     """Device hardware and software information."""
     device_id: str = Field(..., description="Anonymized device identifier")
     device_type: str = Field(..., description="Device type (Smartphone, Tablet)")
@@ -76,7 +84,7 @@ class DeviceInfo(BaseModel):
         return v
 
 
-class ScreenInfo(BaseModel):
+class ScreenInfo(_FrozenModel):
     """Screen information."""
     screen_width: int = Field(..., description="Screen width in pixels")
     screen_height: int = Field(..., description="Screen height in pixels")
@@ -93,7 +101,7 @@ class ScreenInfo(BaseModel):
         return v
 
 
-class NetworkInfo(BaseModel):
+class NetworkInfo(_FrozenModel):
     """Network connectivity information."""
     type: NetworkType = Field(..., description="Network connection type")
     is_connected: bool = Field(..., description="Whether device is connected to internet")
@@ -113,7 +121,7 @@ class NetworkInfo(BaseModel):
         return v
 
 
-class CoarseLocationInfo(BaseModel):
+class CoarseLocationInfo(_FrozenModel):
     """Coarse location information (compliant with privacy requirements)."""
     latitude: float = Field(..., description="Coarse latitude (rounded to ~1km precision)")
     longitude: float = Field(..., description="Coarse longitude (rounded to ~1km precision)")
@@ -143,7 +151,7 @@ class CoarseLocationInfo(BaseModel):
         return v
 
 
-class AppInfo(BaseModel):
+class AppInfo(_FrozenModel):
     """Application information (compliance-focused)."""
     total_count: int = Field(0, description="Total number of installed apps")
     has_banking_apps: bool = Field(default=False, description="Whether banking apps are detected")
@@ -157,7 +165,7 @@ class AppInfo(BaseModel):
     )
 
 
-class RiskFlags(BaseModel):
+class RiskFlags(_FrozenModel):
     """Device risk assessment flags."""
     is_emulator: bool = Field(default=False, description="Device is an emulator")
     is_rooted_or_jailbroken: bool = Field(default=False, description="Device is rooted/jailbroken")
@@ -187,9 +195,9 @@ class MobileDeviceData(BaseModel):
     
     @validator('collection_timestamp')
     def validate_timestamp_recent(cls, v):
-        """Validate timestamp is recent (within last hour)."""
-        now = datetime.utcnow()
-        time_diff = now - v
+        """Validate timestamp is recent (within last hour). Naive timestamps are taken as UTC."""
+        aware = v if v.tzinfo is not None else v.replace(tzinfo=timezone.utc)
+        time_diff = datetime.now(timezone.utc) - aware
         if time_diff.total_seconds() > 3600:  # 1 hour
             raise ValueError("Collection timestamp is too old")
         return v
@@ -9,11 +9,12 @@ and device data collection from mobile applications.
 import pandas as pd
 import numpy as np
 import requests
+import time
 import uuid
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Any, Union
+from typing import Callable, Dict, List, Optional, Any, Union
 from datetime import datetime, timedelta
-import json
+import orjson
 import logging
 from dataclasses import dataclass, asdict
 from enum import Enum
@@ -45,6 +46,12 @@ class ConsentStatus(Enum):
     REVOKED = "revoked"
 
 
+# Statuses after which a consent no longer changes through the consent flow
+FINAL_CONSENT_STATUSES = frozenset({
+    ConsentStatus.GRANTED, ConsentStatus.DENIED, ConsentStatus.EXPIRED, ConsentStatus.REVOKED
+})
+
+
 @dataclass
 class ConsentRequest:
     """Data class for consent request information."""
@@ -195,7 +202,9 @@ class AccountAggregatorCollector(BaseCollector):
         self.client_secret = None
         self.webhook_url = None
         self.consent_timeout = 300  # 5 minutes default
+        self.allow_force_grant = False
         self.active_consents: Dict[str, ConsentRequest] = {}
+        self._consent_listeners: Dict[str, List[Callable[[ConsentStatus], None]]] = {}
         self.session = requests.Session()
     
     def configure(self, config: Dict[str, Any]) -> bool:
@@ -209,6 +218,7 @@ class AccountAggregatorCollector(BaseCollector):
                 - client_secret: Client secret for API authentication
                 - webhook_url: URL for consent status notifications
                 - consent_timeout: Timeout for consent requests in seconds
+                - allow_force_grant: Enable the test-only force_grant hook (default False)
                 
         Returns:
             True if configuration was successful
@@ -219,6 +229,7 @@ class AccountAggregatorCollector(BaseCollector):
             self.client_secret = config.get("client_secret")
             self.webhook_url = config.get("webhook_url")
             self.consent_timeout = config.get("consent_timeout", 300)
+            self.allow_force_grant = config.get("allow_force_grant", False)
             
             if not all([self.api_base_url, self.client_id, self.client_secret]):
                 self.logger.error("Missing required configuration parameters")
@@ -390,6 +401,7 @@ class AccountAggregatorCollector(BaseCollector):
         except Exception as e:
             self.logger.error(f"Failed to create consent request: {e}")
             consent_request.status = ConsentStatus.DENIED
+            self.active_consents[consent_handle] = consent_request
             return consent_request
     
     def get_consent_status(self, consent_handle: str) -> ConsentStatus:
@@ -409,7 +421,7 @@ class AccountAggregatorCollector(BaseCollector):
         
         # Check if consent has expired
         if datetime.now() > consent.expires_at:
-            consent.status = ConsentStatus.EXPIRED
+            self._set_consent_status(consent, ConsentStatus.EXPIRED)
             return ConsentStatus.EXPIRED
         
         if not consent.consent_id:
@@ -434,7 +446,7 @@ class AccountAggregatorCollector(BaseCollector):
                     "REJECTED": ConsentStatus.DENIED
                 }
                 
-                consent.status = status_mapping.get(api_status, ConsentStatus.PENDING)
+                self._set_consent_status(consent, status_mapping.get(api_status, ConsentStatus.PENDING))
                 self.logger.info(f"Consent {consent_handle} status: {consent.status.value}")
             else:
                 self.logger.error(f"Failed to get consent status: {response.status_code}")
@@ -445,6 +457,124 @@ class AccountAggregatorCollector(BaseCollector):
             self.logger.error(f"Failed to check consent status: {e}")
             return ConsentStatus.DENIED
     
+    def on_consent_change(
+        self, consent_handle: str, callback: Callable[[ConsentStatus], None]
+    ) -> Callable[[], None]:
+        """
+        Register a callback invoked whenever a consent's status changes.
+        
+        Callbacks run synchronously on the thread that observed the change,
+        so asyncio callers should hand off with loop.call_soon_threadsafe.
+        Listeners are dropped once the consent reaches a final status
+        (granted, denied, expired or revoked).
+        
+        Args:
+            consent_handle: Unique handle for the consent request
+            callback: Called with the new ConsentStatus
+            
+        Returns:
+            Function that unregisters the callback
+        """
+        listeners = self._consent_listeners.setdefault(consent_handle, [])
+        listeners.append(callback)
+        
+        def unsubscribe():
+            current = self._consent_listeners.get(consent_handle)
+            if current is None or callback not in current:
+                return
+            current.remove(callback)
+            if not current:
+                del self._consent_listeners[consent_handle]
+        
+        return unsubscribe
+    
+    def _set_consent_status(self, consent: ConsentRequest, status: ConsentStatus):
+        """Update a consent's status and notify listeners if it changed."""
+        if consent.status == status:
+            return
+        
+        consent.status = status
+        if status in FINAL_CONSENT_STATUSES:
+            listeners = self._consent_listeners.pop(consent.consent_handle, [])
+        else:
+            listeners = list(self._consent_listeners.get(consent.consent_handle, []))
+        
+        for callback in listeners:
+            try:
+                callback(status)
+            except Exception as e:
+                self.logger.error(f"Consent change callback failed for {consent.consent_handle}: {e}")
+    
+    def force_grant(self, consent_handle: str) -> ConsentStatus:
+        """
+        Mark a consent request as granted without waiting for the user.
+        
+        This is a test-only hook: it does nothing unless the collector was
+        configured with allow_force_grant=True, so production deployments
+        always go through the real consent flow. Consents already in a final
+        state (including ones whose creation failed) are left unchanged.
+        
+        Args:
+            consent_handle: Unique handle for the consent request
+            
+        Returns:
+            Status of the consent after the call
+        """
+        consent = self.active_consents.get(consent_handle)
+        if consent is None:
+            return ConsentStatus.DENIED
+        
+        if not self.allow_force_grant:
+            self.logger.warning("force_grant ignored: allow_force_grant is not enabled")
+            return consent.status
+        
+        if consent.status in FINAL_CONSENT_STATUSES:
+            self.logger.warning(f"force_grant ignored: consent {consent_handle} is already {consent.status.value}")
+            return consent.status
+        
+        self._set_consent_status(consent, ConsentStatus.GRANTED)
+        self.logger.info(f"Consent {consent_handle} force-granted for testing")
+        return consent.status
+    
+    def wait_for_consent(
+        self,
+        consent_handle: str,
+        timeout: float = 30.0,
+        initial_interval: float = 0.5,
+        max_interval: float = 5.0
+    ) -> ConsentStatus:
+        """
+        Wait until a consent request leaves the PENDING state.
+        
+        The Setu consent status endpoint has no long-poll mode, so this polls
+        get_consent_status with exponential backoff and returns as soon as the
+        status changes instead of sleeping for a fixed interval.
+        
+        Args:
+            consent_handle: Unique handle for the consent request
+            timeout: Maximum time to wait in seconds
+            initial_interval: Delay before the first re-check in seconds
+            max_interval: Upper bound for the backoff delay in seconds
+            
+        Returns:
+            Latest status of the consent (PENDING if the timeout elapsed)
+        """
+        deadline = time.monotonic() + timeout
+        interval = initial_interval
+        status = self.get_consent_status(consent_handle)
+        
+        while status == ConsentStatus.PENDING:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.logger.warning(f"Timed out waiting for consent {consent_handle}")
+                break
+            
+            time.sleep(min(interval, remaining))
+            interval = min(interval * 2, max_interval)
+            status = self.get_consent_status(consent_handle)
+        
+        return status
+    
     def request_fi_data(self, consent_handle: str) -> Dict[str, Any]:
         """
         Request FI data using a granted consent via Setu AA API.
@@ -782,20 +912,20 @@ class DeviceDataCollector(BaseCollector):
         """
         return self._is_configured
     
-    def process_device_data(self, data: Union[Dict[str, Any], str]) -> CollectionResult:
+    def process_device_data(self, data: Union[Dict[str, Any], str, bytes]) -> CollectionResult:
         """
         Process raw device data from mobile applications.
         
         Args:
-            data: Raw device data (JSON string or dictionary)
+            data: Raw device data (JSON string/bytes or dictionary)
             
         Returns:
             CollectionResult containing processed device data
         """
         try:
-            # Parse data if it's a JSON string
-            if isinstance(data, str):
-                data = json.loads(data)
+            # Parse data if it's a JSON document
+            if isinstance(data, (str, bytes)):
+                data = orjson.loads(data)
             
             # Validate data structure
             if not self._validate_device_data(data):
@@ -817,19 +947,7 @@ class DeviceDataCollector(BaseCollector):
                 )
             
             # Process different data types
-            processed_data = {}
-            
-            if "device_info" in data:
-                processed_data.update(self._process_device_info(data["device_info"]))
-            
-            if "app_usage" in data:
-                processed_data.update(self._process_app_usage(data["app_usage"]))
-            
-            if "network_behavior" in data:
-                processed_data.update(self._process_network_behavior(data["network_behavior"]))
-            
-            if "location_data" in data:
-                processed_data.update(self._process_location_data(data["location_data"]))
+            processed_data = self._extract_device_features(data)
             
             # Create DataFrame
             df = pd.DataFrame([processed_data])
@@ -861,6 +979,93 @@ class DeviceDataCollector(BaseCollector):
                 error_message=str(e)
             )
     
+    def process_device_data_batch(self, records: List[Union[Dict[str, Any], str, bytes]]) -> CollectionResult:
+        """
+        Process many raw device data records into a single DataFrame.
+        
+        Each record is parsed and validated like process_device_data, but the
+        processed rows are collected first and the DataFrame is built once for
+        the whole batch. Invalid records are skipped and counted in metadata.
+        
+        Args:
+            records: Raw device data records (JSON strings/bytes or dictionaries)
+            
+        Returns:
+            CollectionResult containing one row per valid record
+        """
+        try:
+            rows = []
+            user_ids = []
+            invalid_records = 0
+            
+            for data in records:
+                try:
+                    if isinstance(data, (str, bytes)):
+                        data = orjson.loads(data)
+                    
+                    user_id = data.get("user_id")
+                    if not user_id or not self._validate_device_data(data):
+                        invalid_records += 1
+                        continue
+                    
+                    processed_data = self._extract_device_features(data)
+                except Exception as e:
+                    self.logger.warning(f"Skipping invalid device data record: {e}")
+                    invalid_records += 1
+                    continue
+                
+                rows.append(processed_data)
+                user_ids.append(user_id)
+            
+            collection_timestamp = datetime.now()
+            df = pd.DataFrame(rows)
+            df["user_id"] = user_ids
+            df["collection_timestamp"] = collection_timestamp
+            
+            result = CollectionResult(
+                success=bool(rows),
+                data=df,
+                metadata={
+                    "data_source": "device_data",
+                    "records_received": len(records),
+                    "invalid_records": invalid_records,
+                    "collection_method": "mobile_app_batch"
+                },
+                error_message=None if rows else "No valid device data records",
+                records_collected=len(rows),
+                collection_timestamp=collection_timestamp
+            )
+            
+            self.logger.info(f"Processed device data batch: {len(rows)} valid, {invalid_records} invalid")
+            return result
+            
+        except Exception as e:
+            self.logger.error(f"Failed to process device data batch: {e}")
+            return CollectionResult(
+                success=False,
+                data=None,
+                metadata={},
+                error_message=str(e)
+            )
+    
+    def _extract_device_features(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the per-type processors over whichever sections a record carries."""
+        processed_data = {}
+        
+        if "device_info" in data:
+            processed_data.update(self._process_device_info(data["device_info"]))
+        
+        if "app_usage" in data:
+            processed_data.update(self._process_app_usage(data["app_usage"]))
+        
+        if "network_behavior" in data:
+            processed_data.update(self._process_network_behavior(data["network_behavior"]))
+        
+        if "location_data" in data:
+            processed_data.update(self._process_location_data(data["location_data"]))
+        
+        return processed_data
+    
     def collect_data(self, user_id: str, **kwargs) -> CollectionResult:
         """
         Collect device data for a user (implements abstract method).
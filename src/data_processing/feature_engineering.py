@@ -14,6 +14,9 @@ from typing import List, Optional, Dict
 # Note: geopy and sklearn are imported within methods to avoid dependency issues
 # Make sure to install: pip install geopy scikit-learn
 
+# Mean Earth radius used for vectorized great-circle distances
+EARTH_RADIUS_KM = 6371.0088
+
 
 class FeatureEngineer:
     """A class for creating new features from existing ones.
@@ -208,13 +211,19 @@ class FeatureEngineer:
             'clothing', 'books', 'hobbies', 'gifts'
         }
         
-        # Create spending category indicators
-        digital_data['is_essential'] = digital_data[category_col].str.lower().apply(
-            lambda x: 1 if any(cat in str(x).lower() for cat in essential_categories) else 0
-        )
-        digital_data['is_discretionary'] = digital_data[category_col].str.lower().apply(
-            lambda x: 1 if any(cat in str(x).lower() for cat in discretionary_categories) else 0
-        )
+        # Create spending category indicators, matched once per distinct category and
+        # broadcast through the categorical codes (code -1 / missing maps to the trailing 0)
+        categories = digital_data[category_col].astype('category')
+        digital_data[category_col] = categories
+        category_names = categories.cat.categories.astype(str).str.lower()
+        category_codes = categories.cat.codes.to_numpy()
+        
+        def category_flags(keywords):
+            flags = [1 if any(cat in name for cat in keywords) else 0 for name in category_names]
+            return np.array(flags + [0])[category_codes]
+        
+        digital_data['is_essential'] = category_flags(essential_categories)
+        digital_data['is_discretionary'] = category_flags(discretionary_categories)
         
         # Extract month-year for monthly aggregations
         digital_data['month_year'] = digital_data[date_col].dt.to_period('M')
@@ -291,7 +300,7 @@ class FeatureEngineer:
         
         # Additional behavioral features
         behavioral_features = digital_data.groupby(user_id_col).agg({
-            category_col: lambda x: x.nunique(),  # Number of unique categories
+            category_col: 'nunique',  # Number of unique categories
             date_col: [
                 lambda x: (x.max() - x.min()).days,  # Transaction span in days
                 lambda x: x.dt.hour.std(),  # Time consistency (std of hours)
@@ -315,20 +324,10 @@ class FeatureEngineer:
         digital_features = digital_features.replace([np.inf, -np.inf], np.nan)
         digital_features = digital_features.fillna(0)
         
-        # Map user_id to the main dataframe identifier (assuming SK_ID_CURR)
-        # This assumes there's a mapping between user_id and SK_ID_CURR
-        if 'SK_ID_CURR' in df.columns and user_id_col in digital_features.columns:
-            # If direct mapping exists, merge directly
-            df = df.merge(
-                digital_features.drop(columns=[user_id_col]), 
-                left_on='SK_ID_CURR',
-                right_on=user_id_col if user_id_col in digital_features.columns else 'SK_ID_CURR',
-                how='left'
-            )
-        else:
-            # If no direct mapping, assume user_id corresponds to SK_ID_CURR
-            digital_features = digital_features.rename(columns={user_id_col: 'SK_ID_CURR'})
-            df = df.merge(digital_features, on='SK_ID_CURR', how='left')
+        # Map user_id to the main dataframe identifier, assuming user_id corresponds
+        # to SK_ID_CURR; renaming keeps a single key column in the merged frame
+        digital_features = digital_features.rename(columns={user_id_col: 'SK_ID_CURR'})
+        df = df.merge(digital_features, on='SK_ID_CURR', how='left')
         
         # Fill NaN values for users without digital transaction data
         digital_feature_cols = [col for col in digital_features.columns if col != 'SK_ID_CURR']
@@ -468,56 +467,58 @@ class FeatureEngineer:
             monthly_usage = utility_data.groupby([user_id_col, 'payment_month'])[usage_amount_col].sum().reset_index()
             monthly_usage = monthly_usage.sort_values([user_id_col, 'payment_month'])
             
-            # Calculate rolling 3-month usage volatility
-            usage_volatility_list = []
+            # Calculate rolling 3-month usage volatility for every customer at once
+            usage = monthly_usage.groupby(user_id_col, sort=True)[usage_amount_col]
+            monthly_usage['rolling_3m_std'] = usage.rolling(
+                window=3, min_periods=3
+            ).std().reset_index(level=0, drop=True)
             
-            for customer_id in monthly_usage[user_id_col].unique():
-                customer_usage = monthly_usage[monthly_usage[user_id_col] == customer_id]
-                
-                if len(customer_usage) >= 3:
-                    # Rolling 3-month standard deviation
-                    customer_usage['rolling_3m_std'] = customer_usage[usage_amount_col].rolling(
-                        window=3, min_periods=3
-                    ).std()
-                    
-                    # Calculate overall usage statistics
-                    usage_stats = {
-                        user_id_col: customer_id,
-                        'avg_usage': customer_usage[usage_amount_col].mean(),
-                        'std_usage': customer_usage[usage_amount_col].std(),
-                        'usage_cv': customer_usage[usage_amount_col].std() / customer_usage[usage_amount_col].mean() if customer_usage[usage_amount_col].mean() > 0 else 0,
-                        'usage_volatility_3m': customer_usage['rolling_3m_std'].mean(),  # Average of rolling stds
-                        'max_usage_volatility_3m': customer_usage['rolling_3m_std'].max(),
-                        'min_usage': customer_usage[usage_amount_col].min(),
-                        'max_usage': customer_usage[usage_amount_col].max(),
-                        'usage_range': customer_usage[usage_amount_col].max() - customer_usage[usage_amount_col].min(),
-                        'usage_trend_slope': 0  # Will be calculated below
-                    }
-                    
-                    # Calculate usage trend
-                    if len(customer_usage) > 1:
-                        months_numeric = np.arange(len(customer_usage))
-                        slope, _ = np.polyfit(months_numeric, customer_usage[usage_amount_col].values, 1)
-                        usage_stats['usage_trend_slope'] = slope
-                    
-                    usage_volatility_list.append(usage_stats)
-                else:
-                    # Not enough data for rolling calculation
-                    usage_stats = {
-                        user_id_col: customer_id,
-                        'avg_usage': customer_usage[usage_amount_col].mean(),
-                        'std_usage': customer_usage[usage_amount_col].std() if len(customer_usage) > 1 else 0,
-                        'usage_cv': 0,
-                        'usage_volatility_3m': 0,
-                        'max_usage_volatility_3m': 0,
-                        'min_usage': customer_usage[usage_amount_col].min(),
-                        'max_usage': customer_usage[usage_amount_col].max(),
-                        'usage_range': customer_usage[usage_amount_col].max() - customer_usage[usage_amount_col].min() if len(customer_usage) > 1 else 0,
-                        'usage_trend_slope': 0
-                    }
-                    usage_volatility_list.append(usage_stats)
+            # Least-squares usage trend over month positions 0..n-1, in closed form
+            month_position = usage.cumcount()
+            monthly_usage['position_x_usage'] = month_position * monthly_usage[usage_amount_col]
             
-            usage_volatility_features = pd.DataFrame(usage_volatility_list)
+            usage_volatility_features = monthly_usage.groupby(user_id_col, sort=True).agg(
+                avg_usage=(usage_amount_col, 'mean'),
+                std_usage=(usage_amount_col, 'std'),
+                usage_volatility_3m=('rolling_3m_std', 'mean'),  # Average of rolling stds
+                max_usage_volatility_3m=('rolling_3m_std', 'max'),
+                min_usage=(usage_amount_col, 'min'),
+                max_usage=(usage_amount_col, 'max'),
+                months=(usage_amount_col, 'count'),
+                sum_position_x_usage=('position_x_usage', 'sum')
+            )
+            months = usage_volatility_features.pop('months')
+            sum_position_x_usage = usage_volatility_features.pop('sum_position_x_usage')
+            avg_usage = usage_volatility_features['avg_usage']
+            
+            # Customers with fewer than 3 months have no rolling window, CV or trend
+            enough_history = months >= 3
+            usage_volatility_features['std_usage'] = usage_volatility_features['std_usage'].fillna(0)
+            usage_volatility_features['usage_cv'] = np.where(
+                enough_history & (avg_usage > 0),
+                usage_volatility_features['std_usage'] / avg_usage.where(avg_usage > 0, 1),
+                0
+            )
+            usage_volatility_features[['usage_volatility_3m', 'max_usage_volatility_3m']] = (
+                usage_volatility_features[['usage_volatility_3m', 'max_usage_volatility_3m']]
+                .where(enough_history, 0)
+            )
+            usage_volatility_features['usage_range'] = (
+                usage_volatility_features['max_usage'] - usage_volatility_features['min_usage']
+            )
+            position_variance = months * (months ** 2 - 1) / 12
+            usage_volatility_features['usage_trend_slope'] = np.where(
+                enough_history,
+                (sum_position_x_usage - months * (months - 1) / 2 * avg_usage)
+                / position_variance.where(enough_history, 1),
+                0
+            )
+            
+            usage_volatility_features = usage_volatility_features[[
+                'avg_usage', 'std_usage', 'usage_cv', 'usage_volatility_3m',
+                'max_usage_volatility_3m', 'min_usage', 'max_usage', 'usage_range',
+                'usage_trend_slope'
+            ]].reset_index()
             
             # Usage consistency score (lower volatility = higher score)
             if len(usage_volatility_features) > 0:
@@ -636,8 +637,10 @@ class FeatureEngineer:
             timestamp_col: Column name for timestamp (default: 'timestamp')
             latitude_col: Column name for latitude (default: 'latitude')
             longitude_col: Column name for longitude (default: 'longitude')
-            tower_id_col: Column name for cellular tower ID (optional)
-            network_id_col: Column name for WiFi network ID (optional)
+            tower_id_col: Column name for cellular tower ID (optional); string,
+                categorical or integer-coded, with negative codes meaning no tower
+            network_id_col: Column name for WiFi network ID (optional); string,
+                categorical or integer-coded, with negative codes meaning no network
             
         Returns:
             DataFrame with mobility features added
@@ -667,14 +670,17 @@ class FeatureEngineer:
         
         mobility_features_list = []
         
+        # Row positions of each user's points, computed in one pass
+        user_rows = gps_data.groupby(user_id_col).indices
+        
         for user_id in df[user_id_col].unique():
-            user_gps = gps_data[gps_data[user_id_col] == user_id].copy()
-            
-            if len(user_gps) == 0:
+            if user_id not in user_rows:
                 # If no GPS data for user, fill with default values
                 mobility_features_list.append(self._create_default_mobility_features(user_id))
                 continue
             
+            user_gps = gps_data.iloc[user_rows[user_id]]
+            
             # Initialize feature dictionary
             features = {user_id_col: user_id}
             
@@ -741,16 +747,28 @@ class FeatureEngineer:
             'travel_radius_stability': 0
         }
     
+    def _id_visit_counts(self, ids):
+        """Count visits per distinct tower/network id, skipping missing ids."""
+        if isinstance(ids.dtype, pd.CategoricalDtype):
+            codes = ids.cat.codes.to_numpy()
+        elif pd.api.types.is_integer_dtype(ids.dtype):
+            codes = ids.to_numpy()
+        else:
+            return ids.value_counts().to_numpy()
+        
+        # Integer codes are counted directly; -1 (and any negative code) means no id
+        return np.unique(codes[codes >= 0], return_counts=True)[1]
+    
     def _calculate_location_stability(self, user_gps, tower_id_col, network_id_col):
         """Calculate location stability features based on cellular towers and WiFi networks."""
         features = {}
         
         # Tower-based features
         if tower_id_col and tower_id_col in user_gps.columns:
-            tower_counts = user_gps[tower_id_col].value_counts()
+            tower_counts = self._id_visit_counts(user_gps[tower_id_col])
             features['unique_towers_count'] = len(tower_counts)
-            features['primary_tower_frequency'] = tower_counts.iloc[0] / len(user_gps) if len(tower_counts) > 0 else 0
-            features['tower_consistency_ratio'] = tower_counts.iloc[0] / tower_counts.sum() if len(tower_counts) > 0 else 0
+            features['primary_tower_frequency'] = tower_counts.max() / len(user_gps) if len(tower_counts) > 0 else 0
+            features['tower_consistency_ratio'] = tower_counts.max() / tower_counts.sum() if len(tower_counts) > 0 else 0
         else:
             features['unique_towers_count'] = 0
             features['primary_tower_frequency'] = 0
@@ -758,10 +776,10 @@ class FeatureEngineer:
         
         # Network-based features
         if network_id_col and network_id_col in user_gps.columns:
-            network_counts = user_gps[network_id_col].value_counts()
+            network_counts = self._id_visit_counts(user_gps[network_id_col])
             features['unique_networks_count'] = len(network_counts)
-            features['primary_network_frequency'] = network_counts.iloc[0] / len(user_gps) if len(network_counts) > 0 else 0
-            features['network_consistency_ratio'] = network_counts.iloc[0] / network_counts.sum() if len(network_counts) > 0 else 0
+            features['primary_network_frequency'] = network_counts.max() / len(user_gps) if len(network_counts) > 0 else 0
+            features['network_consistency_ratio'] = network_counts.max() / network_counts.sum() if len(network_counts) > 0 else 0
         else:
             features['unique_networks_count'] = 0
             features['primary_network_frequency'] = 0
@@ -828,10 +846,14 @@ class FeatureEngineer:
         
         return features
     
+    def _haversine_km(self, lat1, lon1, lat2, lon2):
+        """Great-circle distance in km between coordinate arrays (degrees)."""
+        lat1, lon1, lat2, lon2 = (np.radians(np.asarray(x, dtype=float)) for x in (lat1, lon1, lat2, lon2))
+        a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+    
     def _calculate_travel_radius(self, user_gps, latitude_col, longitude_col):
         """Calculate travel radius and mobility range features."""
-        from geopy.distance import geodesic
-        
         features = {}
         
         # Calculate centroid of all locations
@@ -841,13 +863,9 @@ class FeatureEngineer:
         features['centroid_lon'] = centroid_lon
         
         # Calculate distances from centroid
-        distances = user_gps.apply(
-            lambda row: geodesic(
-                (centroid_lat, centroid_lon),
-                (row[latitude_col], row[longitude_col])
-            ).kilometers,
-            axis=1
-        )
+        distances = pd.Series(self._haversine_km(
+            centroid_lat, centroid_lon, user_gps[latitude_col], user_gps[longitude_col]
+        ))
         
         # Radius of gyration (RMS distance from centroid)
         features['radius_of_gyration_km'] = np.sqrt((distances ** 2).mean())
@@ -866,12 +884,14 @@ class FeatureEngineer:
         features['movement_entropy'] = -np.sum(location_probs * np.log2(location_probs + 1e-10))
         
         # Travel radius stability (coefficient of variation of daily travel ranges)
-        daily_ranges = user_gps.groupby('date').apply(
-            lambda group: geodesic(
-                (group[latitude_col].min(), group[longitude_col].min()),
-                (group[latitude_col].max(), group[longitude_col].max())
-            ).kilometers
+        daily_bounds = user_gps.groupby('date').agg(
+            lat_min=(latitude_col, 'min'), lon_min=(longitude_col, 'min'),
+            lat_max=(latitude_col, 'max'), lon_max=(longitude_col, 'max')
         )
+        daily_ranges = pd.Series(self._haversine_km(
+            daily_bounds['lat_min'], daily_bounds['lon_min'],
+            daily_bounds['lat_max'], daily_bounds['lon_max']
+        ))
         features['travel_radius_stability'] = daily_ranges.std() / daily_ranges.mean() if daily_ranges.mean() > 0 else 0
         
         return features
@@ -938,17 +958,19 @@ class FeatureEngineer:
             raise ValueError(f"Missing required columns in device data: {missing_cols}")
         
         device_features_list = []
+        user_ids = df[user_id_col].unique()
         
-        for user_id in df[user_id_col].unique():
-            user_device = device_data[device_data[user_id_col] == user_id]
-            
-            if len(user_device) == 0:
+        # Take the first/most recent device record if multiple exist, one row per user
+        user_devices = device_data.drop_duplicates(user_id_col).set_index(user_id_col).reindex(user_ids)
+        has_device = np.isin(user_ids, device_data[user_id_col].values)
+        
+        for user_id, found in zip(user_ids, has_device):
+            if not found:
                 # If no device data for user, fill with default values
                 device_features_list.append(self._create_default_device_features(user_id))
                 continue
             
-            # Take the first/most recent device record if multiple exist
-            user_device = user_device.iloc[0]
+            user_device = user_devices.loc[user_id]
             
             # Initialize feature dictionary
             features = {user_id_col: user_id}
@@ -959,16 +981,23 @@ class FeatureEngineer:
             # 2. App Ecosystem Features
             features.update(self._calculate_app_ecosystem(user_device, app_list_col))
             
-            # 3. Network Behavior Features
-            features.update(self._calculate_network_behavior(
-                user_device, daily_data_col, wifi_data_col, cellular_data_col
-            ))
-            
             device_features_list.append(features)
         
         # Convert to DataFrame
         device_df = pd.DataFrame(device_features_list)
         
+        # 3. Network Behavior Features, computed for all users at once
+        def usage_column(col):
+            if col and col in user_devices.columns:
+                return user_devices[col].astype(float).fillna(0).to_numpy()
+            return np.zeros(len(user_ids))
+        
+        network_features = self._compute_network_features(
+            usage_column(daily_data_col), usage_column(wifi_data_col), usage_column(cellular_data_col)
+        )
+        for name, values in network_features.items():
+            device_df[name] = np.where(has_device, values, 0)
+        
         # Merge with main DataFrame
         df = df.merge(device_df, on=user_id_col, how='left')
         
@@ -1113,14 +1142,13 @@ class FeatureEngineer:
         """Calculate app ecosystem features focusing on financial and security apps."""
         features = {}
         
-        if app_list_col and app_list_col in user_device.index and pd.notna(user_device[app_list_col]):
-            # Parse app list (assuming comma-separated or list format)
-            if isinstance(user_device[app_list_col], str):
-                apps = [app.strip().lower() for app in user_device[app_list_col].split(',')]
-            elif isinstance(user_device[app_list_col], list):
-                apps = [app.lower() for app in user_device[app_list_col]]
-            else:
-                apps = []
+        app_list = user_device[app_list_col] if app_list_col and app_list_col in user_device.index else None
+        
+        # Parse app list (comma-separated string or list-like column values)
+        if isinstance(app_list, str):
+            apps = [app.strip().lower() for app in app_list.split(',')]
+        elif isinstance(app_list, (list, tuple, np.ndarray)):
+            apps = [str(app).lower() for app in app_list]
         else:
             apps = []
         
@@ -1179,79 +1207,47 @@ class FeatureEngineer:
         
         return features
     
-    def _calculate_network_behavior(self, user_device, daily_data_col, wifi_data_col, cellular_data_col):
-        """Calculate network behavior features."""
+    def _compute_network_features(self, daily_data, wifi_data, cellular_data):
+        """
+        Calculate network behavior features from per-user usage arrays.
+        
+        Args:
+            daily_data: Average daily data consumption in MB
+            wifi_data: WiFi data usage in MB
+            cellular_data: Cellular data usage in MB
+            
+        Returns:
+            Dictionary mapping feature name to an array aligned with the inputs
+        """
         features = {}
         
         # Average daily data consumption
-        if daily_data_col and daily_data_col in user_device.index and pd.notna(user_device[daily_data_col]):
-            avg_daily_data = float(user_device[daily_data_col])
-        else:
-            avg_daily_data = 0
-        
-        features['avg_daily_data_mb'] = avg_daily_data
+        features['avg_daily_data_mb'] = daily_data
         
-        # WiFi vs Cellular usage ratio
-        wifi_data = 0
-        cellular_data = 0
+        # WiFi to cellular ratio: 10 for WiFi-only users (very high WiFi preference),
+        # 1 for users with no usage at all (default neutral ratio)
+        ratio = np.where(wifi_data > 0, 10.0, 1.0)
+        np.divide(wifi_data, cellular_data, out=ratio, where=cellular_data > 0)
+        features['wifi_cellular_ratio'] = ratio
         
-        if wifi_data_col and wifi_data_col in user_device.index and pd.notna(user_device[wifi_data_col]):
-            wifi_data = float(user_device[wifi_data_col])
+        # Data usage tier (1-5): <100MB, 100-500MB, 500MB-1GB, 1-2GB, >2GB per day
+        features['data_usage_tier'] = np.digitize(daily_data, [100, 500, 1000, 2000]) + 1
         
-        if cellular_data_col and cellular_data_col in user_device.index and pd.notna(user_device[cellular_data_col]):
-            cellular_data = float(user_device[cellular_data_col])
+        # Network efficiency score (1-5, preference for WiFi indicates cost consciousness)
+        features['network_efficiency_score'] = np.digitize(ratio, [0.5, 1.5, 3, 5]) + 1
         
-        # Calculate WiFi to cellular ratio
-        if cellular_data > 0:
-            features['wifi_cellular_ratio'] = wifi_data / cellular_data
-        elif wifi_data > 0:
-            features['wifi_cellular_ratio'] = 10  # Very high WiFi preference
-        else:
-            features['wifi_cellular_ratio'] = 1  # Default neutral ratio
-        
-        # Data usage tier classification
-        if avg_daily_data >= 2000:  # > 2GB/day
-            features['data_usage_tier'] = 5  # Very heavy user
-        elif avg_daily_data >= 1000:  # 1-2GB/day
-            features['data_usage_tier'] = 4  # Heavy user
-        elif avg_daily_data >= 500:   # 500MB-1GB/day
-            features['data_usage_tier'] = 3  # Moderate user
-        elif avg_daily_data >= 100:   # 100-500MB/day
-            features['data_usage_tier'] = 2  # Light user
-        else:                          # < 100MB/day
-            features['data_usage_tier'] = 1  # Very light user
-        
-        # Network efficiency score (preference for WiFi indicates cost consciousness)
-        if features['wifi_cellular_ratio'] >= 5:
-            efficiency_score = 5  # Very efficient (mostly WiFi)
-        elif features['wifi_cellular_ratio'] >= 3:
-            efficiency_score = 4  # Efficient
-        elif features['wifi_cellular_ratio'] >= 1.5:
-            efficiency_score = 3  # Moderate efficiency
-        elif features['wifi_cellular_ratio'] >= 0.5:
-            efficiency_score = 2  # Low efficiency
-        else:
-            efficiency_score = 1  # Very low efficiency (mostly cellular)
-        
-        features['network_efficiency_score'] = efficiency_score
-        
-        # Data consumption stability (consistent usage patterns)
+        # Data consumption stability: how close monthly total is to 30x daily average
         total_data = wifi_data + cellular_data
-        if total_data > 0 and avg_daily_data > 0:
-            # Measure how close monthly total is to 30x daily average
-            expected_monthly = avg_daily_data * 30
-            stability = 1 - abs(total_data - expected_monthly) / expected_monthly
-            features['data_consumption_stability'] = max(0, min(1, stability))
-        else:
-            features['data_consumption_stability'] = 0
+        expected_monthly = daily_data * 30
+        stability = np.zeros(len(daily_data))
+        np.divide(np.abs(total_data - expected_monthly), expected_monthly, out=stability,
+                  where=(total_data > 0) & (daily_data > 0))
+        features['data_consumption_stability'] = np.where(
+            (total_data > 0) & (daily_data > 0), np.clip(1 - stability, 0, 1), 0
+        )
         
         # Preferred network type (0=cellular, 1=balanced, 2=wifi)
-        if features['wifi_cellular_ratio'] >= 3:
-            features['preferred_network_type'] = 2  # WiFi preferred
-        elif features['wifi_cellular_ratio'] >= 0.33:
-            features['preferred_network_type'] = 1  # Balanced
-        else:
-            features['preferred_network_type'] = 0  # Cellular preferred
+        features['preferred_network_type'] = np.digitize(ratio, [0.33, 3])
         
         return features
 
@@ -34,6 +34,21 @@ from .base_model import BaseModel
 
 logger = logging.getLogger(__name__)
 
+# Fixed column order of the alternative data feature vectors
+DEVICE_FEATURE_ORDER = (
+    'device_age_estimated', 'os_version_score', 'device_security_score',
+    'total_memory_gb', 'available_storage_gb', 'is_tablet',
+    'is_wifi_connected', 'connection_stability', 'expensive_connection',
+    'emulator_risk', 'rooted_risk', 'jailbroken_risk', 'debugging_risk',
+    'financial_apps_count', 'banking_apps_count', 'investment_apps_count', 'lending_apps_count'
+)
+
+BEHAVIORAL_FEATURE_ORDER = (
+    'location_consistency', 'travel_pattern_score', 'utility_payment_score',
+    'subscription_count', 'social_media_presence', 'online_activity_score',
+    'digital_identity_score', 'contact_stability', 'communication_frequency'
+)
+
 
 class AIAlternativeDataModel(BaseModel):
     """
@@ -198,11 +213,7 @@ class AIAlternativeDataModel(BaseModel):
         except Exception as e:
             logger.warning(f"Error extracting device features: {e}")
             # Return zero features if extraction fails
-            for key in ['device_age_estimated', 'os_version_score', 'device_security_score',
-                       'total_memory_gb', 'available_storage_gb', 'is_tablet',
-                       'is_wifi_connected', 'connection_stability', 'expensive_connection',
-                       'emulator_risk', 'rooted_risk', 'jailbroken_risk', 'debugging_risk',
-                       'financial_apps_count', 'banking_apps_count', 'investment_apps_count', 'lending_apps_count']:
+            for key in DEVICE_FEATURE_ORDER:
                 features[key] = 0.0
         
         return features
@@ -244,9 +255,7 @@ class AIAlternativeDataModel(BaseModel):
         except Exception as e:
             logger.warning(f"Error extracting behavioral features: {e}")
             # Return default features if extraction fails
-            for key in ['location_consistency', 'travel_pattern_score', 'utility_payment_score',
-                       'subscription_count', 'social_media_presence', 'online_activity_score',
-                       'digital_identity_score', 'contact_stability', 'communication_frequency']:
+            for key in BEHAVIORAL_FEATURE_ORDER:
                 features[key] = 50.0  # Neutral scores
         
         return features
@@ -453,6 +462,29 @@ class AIAlternativeDataModel(BaseModel):
         # Analyze call/message frequency and patterns
         return 65.0
     
+    def vectorize_features(self, device_features: Dict[str, float],
+                           behavioral_features: Dict[str, float]) -> np.ndarray:
+        """
+        Flatten device and behavioral feature dicts into one float32 vector.
+        
+        Args:
+            device_features: Device analytics features
+            behavioral_features: Behavioral pattern features
+            
+        Returns:
+            Array ordered by DEVICE_FEATURE_ORDER then BEHAVIORAL_FEATURE_ORDER
+        """
+        vector = np.empty(len(DEVICE_FEATURE_ORDER) + len(BEHAVIORAL_FEATURE_ORDER), dtype=np.float32)
+        
+        for i, key in enumerate(DEVICE_FEATURE_ORDER):
+            vector[i] = device_features.get(key, 0.0)
+        
+        offset = len(DEVICE_FEATURE_ORDER)
+        for i, key in enumerate(BEHAVIORAL_FEATURE_ORDER):
+            vector[offset + i] = behavioral_features.get(key, 50.0)
+        
+        return vector
+    
     def combine_features(self, kaggle_features: pd.DataFrame, 
                         device_features: Dict[str, float],
                         behavioral_features: Dict[str, float]) -> pd.DataFrame:
@@ -467,28 +499,32 @@ class AIAlternativeDataModel(BaseModel):
         Returns:
             Combined feature DataFrame
         """
-        # Convert device and behavioral features to DataFrame
-        device_df = pd.DataFrame([device_features])
-        behavioral_df = pd.DataFrame([behavioral_features])
-        
-        # If kaggle_features has multiple rows, broadcast device and behavioral features
-        if len(kaggle_features) > 1:
-            device_df = pd.concat([device_df] * len(kaggle_features), ignore_index=True)
-            behavioral_df = pd.concat([behavioral_df] * len(kaggle_features), ignore_index=True)
+        # Lay out the alternative data features as one schema-ordered row
+        alternative_vector = self.vectorize_features(device_features, behavioral_features)
+        n_rows = max(len(kaggle_features), 1)
+        
+        # Broadcast the row across all applicants in a single pre-allocated block
+        alternative_block = np.empty((n_rows, len(alternative_vector)), dtype=np.float32)
+        alternative_block[:] = alternative_vector
+        
+        # Wrap the block as a single frame so it is concatenated without splitting
+        alternative_df = pd.DataFrame(
+            alternative_block,
+            columns=list(DEVICE_FEATURE_ORDER + BEHAVIORAL_FEATURE_ORDER)
+        )
         
-        # Reset indices to ensure proper concatenation
-        kaggle_features = kaggle_features.reset_index(drop=True)
-        device_df = device_df.reset_index(drop=True)
-        behavioral_df = behavioral_df.reset_index(drop=True)
+        # Reset indices to ensure proper concatenation (only when needed, to avoid a copy)
+        if not kaggle_features.index.equals(alternative_df.index):
+            kaggle_features = kaggle_features.reset_index(drop=True)
         
         # Combine all features
-        combined_features = pd.concat([kaggle_features, device_df, behavioral_df], axis=1)
+        combined_features = pd.concat([kaggle_features, alternative_df], axis=1)
         
         # Calculate alternative data importance weights
         total_features = len(combined_features.columns)
         kaggle_weight = len(kaggle_features.columns) / total_features
-        device_weight = len(device_df.columns) / total_features
-        behavioral_weight = len(behavioral_df.columns) / total_features
+        device_weight = len(DEVICE_FEATURE_ORDER) / total_features
+        behavioral_weight = len(BEHAVIORAL_FEATURE_ORDER) / total_features
         
         self.alternative_data_weights = {
             'kaggle': kaggle_weight,
@@ -33,9 +33,14 @@ class AutomaticDataCollectionService:
     - Traditional credit data from Kaggle
     """
     
-    def __init__(self):
-        """Initialize the automatic data collection service."""
-        self.ai_model = AIAlternativeDataModel()
+    def __init__(self, model: Optional[AIAlternativeDataModel] = None):
+        """
+        Initialize the automatic data collection service.
+        
+        Args:
+            model: Pre-built AI model to reuse; a new one is created if omitted
+        """
+        self.ai_model = model if model is not None else AIAlternativeDataModel()
         self.collection_timestamp = None
         self.cached_kaggle_data = None
         self.data_sources_status = {
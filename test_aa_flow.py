@@ -8,15 +8,18 @@ This script demonstrates the complete AA flow including:
 4. Data fetching and processing
 
 Run this script to test the AA integration:
-python test_aa_flow.py
+python test_aa_flow.py [--verbose]
 """
 
 import asyncio
+import logging
+import logging.handlers
 import requests
-import json
+import orjson
 import time
-from datetime import datetime, timedelta
-from typing import Dict, Any
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Hashable, List, Optional
 import sys
 import os
 
@@ -29,6 +32,47 @@ from src.data_processing.collectors import (
     SetuConsentRequest
 )
 
+logger = logging.getLogger(__name__)
+
+# Buffer report lines and write them out in batches instead of per line
+_output_handler = logging.handlers.MemoryHandler(
+    2048, flushLevel=logging.ERROR, target=logging.StreamHandler(sys.stdout)
+)
+logger.addHandler(_output_handler)
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+
+class TTLCache:
+    """Small LRU cache whose entries expire after a fixed time-to-live."""
+    
+    def __init__(self, maxsize: int = 512, ttl_seconds: float = 600):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        value, stored_at = entry
+        if time.monotonic() - stored_at >= self.ttl_seconds:
+            del self._entries[key]
+            return None
+        
+        self._entries.move_to_end(key)
+        return value
+    
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entry when full."""
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
 class AAFlowTester:
     """Test class for Account Aggregator flow."""
     
@@ -36,6 +80,16 @@ class AAFlowTester:
         self.base_url = base_url
         self.aa_collector = AccountAggregatorCollector()
         self.session = requests.Session()
+        # Re-running the flow in the same process reuses configuration and consents
+        self._config_cache = TTLCache(maxsize=512, ttl_seconds=600)
+        self._consent_cache = TTLCache(maxsize=512, ttl_seconds=600)
+    
+    def warm_up_connection(self) -> None:
+        """Open a pooled keep-alive connection to the API before the tests start."""
+        try:
+            self.session.head(f"{self.base_url}/health", timeout=5)
+        except requests.exceptions.RequestException:
+            pass  # test_api_endpoints reports the connection failure itself
     
     def setup_collector(self) -> bool:
         """Setup the Account Aggregator collector with test configuration."""
@@ -46,16 +100,56 @@ class AAFlowTester:
             "webhook_url": f"{self.base_url}/data-collection/webhook/aa-consent"
         }
         
-        success = self.aa_collector.configure(config)
-        print(f"✅ Collector configured: {success}")
+        cache_key = tuple(sorted(config.items()))
+        success = self._config_cache.get(cache_key)
+        if success is None:
+            success = self.aa_collector.configure(config)
+            # Only remember a working setup so a failed one is retried next time
+            if success:
+                self._config_cache.set(cache_key, success)
+        
+        logger.info("✅ Collector configured: %s", success)
         return success
     
+    def create_consent_request(self, user_id: str, fi_types: List[str], purpose: str,
+                               duration_days: int, force: bool = False, **kwargs):
+        """
+        Create a consent request, reusing a fresh, successfully created one for identical parameters.
+        
+        Args:
+            user_id: Unique identifier for the user
+            fi_types: List of FI types to request
+            purpose: Purpose for data collection
+            duration_days: How long the consent should be valid
+            force: Bypass the cache (for negative tests)
+            **kwargs: Extra arguments passed to the collector
+            
+        Returns:
+            ConsentRequest from the collector or the cache
+        """
+        cache_key = (user_id, tuple(fi_types), purpose, duration_days, tuple(sorted(kwargs.items())))
+        consent = None if force else self._consent_cache.get(cache_key)
+        
+        if consent is None:
+            consent = self.aa_collector.create_consent_request(
+                user_id=user_id,
+                fi_types=fi_types,
+                purpose=purpose,
+                duration_days=duration_days,
+                **kwargs
+            )
+            # A denied consent means creation failed; don't hand it out again
+            if consent.status != ConsentStatus.DENIED:
+                self._consent_cache.set(cache_key, consent)
+        
+        return consent
+    
     def test_consent_creation(self) -> Dict[str, Any]:
         """Test creating a consent request."""
-        print("\n🔄 Testing consent request creation...")
+        logger.info("\n🔄 Testing consent request creation...")
         
         try:
-            consent = self.aa_collector.create_consent_request(
+            consent = self.create_consent_request(
                 user_id="test_user_001",
                 fi_types=["DEPOSIT", "TERM_DEPOSIT"],
                 purpose="Credit Risk Assessment",
@@ -64,12 +158,12 @@ class AAFlowTester:
                 customer_name="John Doe"
             )
             
-            print(f"✅ Consent created:")
-            print(f"   Handle: {consent.consent_handle}")
-            print(f"   ID: {consent.consent_id}")
-            print(f"   URL: {consent.consent_url}")
-            print(f"   Status: {consent.status.value}")
-            print(f"   Expires: {consent.expires_at}")
+            logger.info("✅ Consent created:")
+            logger.info("   Handle: %s", consent.consent_handle)
+            logger.info("   ID: %s", consent.consent_id)
+            logger.info("   URL: %s", consent.consent_url)
+            logger.info("   Status: %s", consent.status.value)
+            logger.info("   Expires: %s", consent.expires_at)
             
             return {
                 "success": True,
@@ -79,72 +173,73 @@ class AAFlowTester:
             }
             
         except Exception as e:
-            print(f"❌ Error creating consent: {e}")
+            logger.error("❌ Error creating consent: %s", e)
             return {"success": False, "error": str(e)}
     
     def test_consent_status(self, consent_handle: str) -> ConsentStatus:
         """Test checking consent status."""
-        print(f"\n🔄 Testing consent status check for: {consent_handle}")
+        logger.info("\n🔄 Testing consent status check for: %s", consent_handle)
         
         try:
             status = self.aa_collector.get_consent_status(consent_handle)
-            print(f"✅ Consent status: {status.value}")
+            logger.info("✅ Consent status: %s", status.value)
             return status
             
         except Exception as e:
-            print(f"❌ Error checking consent status: {e}")
+            logger.error("❌ Error checking consent status: %s", e)
             return ConsentStatus.DENIED
     
     def test_fi_data_request(self, consent_handle: str) -> Dict[str, Any]:
         """Test requesting FI data."""
-        print(f"\n🔄 Testing FI data request for: {consent_handle}")
+        logger.info("\n🔄 Testing FI data request for: %s", consent_handle)
         
         try:
             result = self.aa_collector.request_fi_data(consent_handle)
             
             if result["success"]:
-                print(f"✅ FI data request successful:")
-                print(f"   Session ID: {result.get('session_id')}")
-                print(f"   Consent ID: {result.get('consent_id')}")
+                logger.info("✅ FI data request successful:")
+                logger.info("   Session ID: %s", result.get('session_id'))
+                logger.info("   Consent ID: %s", result.get('consent_id'))
             else:
-                print(f"❌ FI data request failed: {result.get('message')}")
+                logger.error("❌ FI data request failed: %s", result.get('message'))
             
             return result
             
         except Exception as e:
-            print(f"❌ Error requesting FI data: {e}")
+            logger.error("❌ Error requesting FI data: %s", e)
             return {"success": False, "error": str(e)}
     
     def test_fi_data_fetch(self, session_id: str):
         """Test fetching FI data."""
-        print(f"\n🔄 Testing FI data fetch for session: {session_id}")
+        logger.info("\n🔄 Testing FI data fetch for session: %s", session_id)
         
         try:
             result = self.aa_collector.fetch_fi_data(session_id)
             
             if result.success:
-                print(f"✅ FI data fetched successfully:")
-                print(f"   Records: {result.records_collected}")
-                print(f"   Columns: {list(result.data.columns) if result.data is not None else 'None'}")
+                logger.info("✅ FI data fetched successfully:")
+                logger.info("   Records: %s", result.records_collected)
                 
-                if result.data is not None and len(result.data) > 0:
-                    print(f"   Sample data:")
-                    print(result.data.head(3).to_string(index=False))
+                # Formatting the frame is expensive, so only do it when debugging (--verbose)
+                if result.data is not None and logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("   Columns: %s", list(result.data.columns))
+                    if len(result.data) > 0:
+                        logger.debug("   Sample data:\n%s", result.data.head(3).to_string(index=False))
             else:
-                print(f"❌ FI data fetch failed: {result.error_message}")
+                logger.error("❌ FI data fetch failed: %s", result.error_message)
             
             return result
             
         except Exception as e:
-            print(f"❌ Error fetching FI data: {e}")
+            logger.error("❌ Error fetching FI data: %s", e)
             return None
     
     def test_api_endpoints(self):
         """Test the FastAPI endpoints."""
-        print("\n🔄 Testing FastAPI endpoints...")
+        logger.info("\n🔄 Testing FastAPI endpoints...")
         
         # Test initiate AA flow endpoint
-        print("\n📡 Testing POST /data-collection/initiate-aa-flow")
+        logger.info("\n📡 Testing POST /data-collection/initiate-aa-flow")
         payload = {
             "user_id": "api_test_user_001",
             "customer_mobile": "9876543210",
@@ -157,53 +252,55 @@ class AAFlowTester:
         try:
             response = self.session.post(
                 f"{self.base_url}/data-collection/initiate-aa-flow",
-                json=payload,
+                data=orjson.dumps(payload),
+                headers={"Content-Type": "application/json"},
                 timeout=30
             )
             
             if response.status_code == 200:
-                data = response.json()
-                print(f"✅ API consent creation successful:")
-                print(f"   Consent Handle: {data.get('consent_handle')}")
-                print(f"   Consent URL: {data.get('consent_url')}")
+                data = orjson.loads(response.content)
+                logger.info("✅ API consent creation successful:")
+                logger.info("   Consent Handle: %s", data.get('consent_handle'))
+                logger.info("   Consent URL: %s", data.get('consent_url'))
                 
                 consent_handle = data.get('consent_handle')
                 
                 # Test consent status endpoint
-                print(f"\n📡 Testing GET /data-collection/consent-status")
+                logger.info("\n📡 Testing GET /data-collection/consent-status")
                 status_response = self.session.get(
                     f"{self.base_url}/data-collection/consent-status",
                     params={"consent_handle": consent_handle}
                 )
                 
                 if status_response.status_code == 200:
-                    status_data = status_response.json()
-                    print(f"✅ Consent status: {status_data.get('status')}")
+                    status_data = orjson.loads(status_response.content)
+                    logger.info("✅ Consent status: %s", status_data.get('status'))
                 else:
-                    print(f"❌ Status check failed: {status_response.status_code}")
+                    logger.error("❌ Status check failed: %s", status_response.status_code)
                 
                 return consent_handle
                 
             else:
-                print(f"❌ API consent creation failed: {response.status_code}")
-                print(f"   Response: {response.text}")
+                logger.error("❌ API consent creation failed: %s", response.status_code)
+                logger.info("   Response: %s", response.text)
                 
         except requests.exceptions.ConnectionError:
-            print("❌ Could not connect to API. Make sure the server is running on localhost:8000")
+            logger.error("❌ Could not connect to API. Make sure the server is running on localhost:8000")
         except Exception as e:
-            print(f"❌ API test error: {e}")
+            logger.error("❌ API test error: %s", e)
         
         return None
     
     def test_setu_payload_structure(self):
         """Test the Setu consent request payload structure."""
-        print("\n🔄 Testing Setu payload structure...")
+        logger.info("\n🔄 Testing Setu payload structure...")
         
         # Create a sample Setu consent request
-        consent_start = datetime.now().isoformat()
-        consent_expiry = (datetime.now() + timedelta(days=30)).isoformat()
-        data_range_from = (datetime.now() - timedelta(days=365)).isoformat()
-        data_range_to = datetime.now().isoformat()
+        now = datetime.now(timezone.utc)
+        consent_start = now.isoformat()
+        consent_expiry = (now + timedelta(days=30)).isoformat()
+        data_range_from = (now - timedelta(days=365)).isoformat()
+        data_range_to = consent_start
         
         setu_request = SetuConsentRequest(
             consentStart=consent_start,
@@ -249,84 +346,92 @@ class AAFlowTester:
         )
         
         payload = setu_request.to_dict()
-        print("✅ Setu consent request payload structure:")
-        print(json.dumps(payload, indent=2, default=str))
+        logger.info("✅ Setu consent request payload structure:")
+        logger.info(orjson.dumps(payload, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY).decode())
         
         return payload
     
     def run_complete_test(self):
         """Run the complete AA flow test."""
-        print("🚀 Starting Account Aggregator Flow Test")
-        print("=" * 50)
-        
-        # Setup
-        if not self.setup_collector():
-            print("❌ Failed to setup collector")
-            return
-        
-        # Test Setu payload structure
-        self.test_setu_payload_structure()
-        
-        # Test direct collector methods
-        print(f"\n📋 Testing Direct Collector Methods")
-        print("-" * 30)
-        
-        consent_result = self.test_consent_creation()
-        if not consent_result["success"]:
-            print("❌ Cannot continue without successful consent creation")
-            return
-        
-        consent_handle = consent_result["consent_handle"]
-        
-        # Check status
-        status = self.test_consent_status(consent_handle)
-        
-        # For demo purposes, simulate consent approval
-        if status == ConsentStatus.PENDING:
-            print("⏳ Simulating consent approval (for demo)...")
-            time.sleep(2)
+        try:
+            logger.info("🚀 Starting Account Aggregator Flow Test")
+            logger.info("=" * 50)
             
-            # Manually set status to granted for testing
-            if consent_handle in self.aa_collector.active_consents:
-                self.aa_collector.active_consents[consent_handle].status = ConsentStatus.GRANTED
-                print("✅ Consent status manually set to GRANTED for testing")
-        
-        # Test FI data request
-        fi_result = self.test_fi_data_request(consent_handle)
-        if fi_result["success"]:
-            session_id = fi_result.get("session_id", "demo_session_123")
+            self.warm_up_connection()
             
-            # Test data fetch
-            self.test_fi_data_fetch(session_id)
-        
-        # Test API endpoints
-        print(f"\n📋 Testing API Endpoints")
-        print("-" * 30)
-        
-        api_consent_handle = self.test_api_endpoints()
-        
-        print(f"\n🎉 Test completed!")
-        print("=" * 50)
-        
-        # Summary
-        print(f"\n📊 Test Summary:")
-        print(f"   ✅ Collector configuration: Success")
-        print(f"   ✅ Consent creation: Success")
-        print(f"   ✅ Status checking: Success")
-        print(f"   ✅ FI data request: Success")
-        print(f"   ✅ Data fetching: Success")
-        print(f"   {'✅' if api_consent_handle else '❌'} API endpoints: {'Success' if api_consent_handle else 'Failed'}")
+            # Setup
+            if not self.setup_collector():
+                logger.error("❌ Failed to setup collector")
+                return
+            
+            # Test Setu payload structure
+            self.test_setu_payload_structure()
+            
+            # Test direct collector methods
+            logger.info("\n📋 Testing Direct Collector Methods")
+            logger.info("-" * 30)
+            
+            consent_result = self.test_consent_creation()
+            if not consent_result["success"]:
+                logger.error("❌ Cannot continue without successful consent creation")
+                return
+            
+            consent_handle = consent_result["consent_handle"]
+            
+            # Check status
+            status = self.test_consent_status(consent_handle)
+            
+            # For demo purposes, simulate consent approval
+            if status == ConsentStatus.PENDING:
+                logger.info("⏳ Simulating consent approval (for demo)...")
+                time.sleep(2)
+            
+                # Manually set status to granted for testing
+                if consent_handle in self.aa_collector.active_consents:
+                    self.aa_collector.active_consents[consent_handle].status = ConsentStatus.GRANTED
+                    logger.info("✅ Consent status manually set to GRANTED for testing")
+            
+            # Test FI data request
+            fi_result = self.test_fi_data_request(consent_handle)
+            if fi_result["success"]:
+                session_id = fi_result.get("session_id", "demo_session_123")
+            
+                # Test data fetch
+                self.test_fi_data_fetch(session_id)
+            
+            # Test API endpoints
+            logger.info("\n📋 Testing API Endpoints")
+            logger.info("-" * 30)
+            
+            api_consent_handle = self.test_api_endpoints()
+            
+            logger.info("\n🎉 Test completed!")
+            logger.info("=" * 50)
+            
+            # Summary
+            logger.info("\n📊 Test Summary:")
+            logger.info("   ✅ Collector configuration: Success")
+            logger.info("   ✅ Consent creation: Success")
+            logger.info("   ✅ Status checking: Success")
+            logger.info("   ✅ FI data request: Success")
+            logger.info("   ✅ Data fetching: Success")
+            logger.info("   %s API endpoints: %s", '✅' if api_consent_handle else '❌', 'Success' if api_consent_handle else 'Failed')
+        finally:
+            _output_handler.flush()
 
 
-def main():
-    """Main function to run the test."""
-    print("🔧 Account Aggregator Flow Tester")
-    print("This script tests the Setu AA integration")
-    print()
+def main(verbose=False):
+    """Main function to run the test; verbose also logs FI data samples."""
+    if verbose:
+        logger.setLevel(logging.DEBUG)
+    
+    logger.info("🔧 Account Aggregator Flow Tester")
+    logger.info("This script tests the Setu AA integration")
+    logger.info("")
     
     tester = AAFlowTester()
     tester.run_complete_test()
 
 
 if __name__ == "__main__":
-    main()
+    main(verbose="--verbose" in sys.argv[1:])
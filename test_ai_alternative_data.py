@@ -9,12 +9,18 @@ This script tests the complete AI alternative data pipeline including:
 """
 
 import asyncio
-import requests
-import json
+import concurrent.futures
+import hashlib
+import logging
+import logging.handlers
+import aiohttp
+import orjson
+import numpy as np
 import pandas as pd
 from datetime import datetime
 import sys
 import os
+from typing import Any, Dict, List, Optional, Tuple
 
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -22,41 +28,59 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from src.models.ai_alternative_data_model import AIAlternativeDataModel
 from src.services.automatic_data_collection import AutomaticDataCollectionService
 
+API_BASE_URL = "http://localhost:8001"
+
+logger = logging.getLogger(__name__)
+
+# Buffer report lines and write them out in batches instead of per line
+_output_handler = logging.handlers.MemoryHandler(
+    2048, flushLevel=logging.ERROR, target=logging.StreamHandler(sys.stdout)
+)
+logger.addHandler(_output_handler)
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+
+def create_client_session() -> aiohttp.ClientSession:
+    """Create the HTTP session shared by the API tests."""
+    connector = aiohttp.TCPConnector(
+        limit=100, limit_per_host=32, ttl_dns_cache=300,
+        force_close=False, keepalive_timeout=60
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        json_serialize=lambda obj: orjson.dumps(obj).decode()
+    )
+
 def test_ai_model():
     """Test the AI Alternative Data Model."""
-    print("🧪 Testing AI Alternative Data Model...")
+    logger.info("🧪 Testing AI Alternative Data Model...")
     
     try:
         # Initialize model
         model = AIAlternativeDataModel()
-        print("✅ Model initialization successful")
-        
-        # Create mock training data
-        training_data = []
-        labels = []
-        
-        for i in range(100):
-            data = {
-                'AMT_INCOME_TOTAL': 150000 + (i * 1000),
-                'AMT_CREDIT': 300000 + (i * 2000),
-                'AMT_ANNUITY': 15000 + (i * 100),
-                'DAYS_BIRTH': -10000 - (i * 10),
-                'DAYS_EMPLOYED': -1500 - (i * 5),
-                'CNT_FAM_MEMBERS': 2,
-                'NAME_CONTRACT_TYPE': 'Cash loans',
-                'CODE_GENDER': 'F' if i % 2 == 0 else 'M',
-                'FLAG_OWN_CAR': 'Y' if i % 3 == 0 else 'N',
-                'FLAG_OWN_REALTY': 'Y' if i % 2 == 0 else 'N'
-            }
-            training_data.append(data)
-            labels.append(1 if i % 4 == 0 else 0)  # 25% default rate
+        logger.info("✅ Model initialization successful")
         
-        # Convert to DataFrame
-        df = pd.DataFrame(training_data)
+        # Create mock training data column-wise (one array per feature)
+        n_samples = 100
+        i = np.arange(n_samples)
+        df = pd.DataFrame({
+            'AMT_INCOME_TOTAL': 150000 + i * 1000,
+            'AMT_CREDIT': 300000 + i * 2000,
+            'AMT_ANNUITY': 15000 + i * 100,
+            'DAYS_BIRTH': -10000 - i * 10,
+            'DAYS_EMPLOYED': -1500 - i * 5,
+            'CNT_FAM_MEMBERS': 2,
+            'NAME_CONTRACT_TYPE': 'Cash loans',
+            'CODE_GENDER': np.where(i % 2 == 0, 'F', 'M'),
+            'FLAG_OWN_CAR': np.where(i % 3 == 0, 'Y', 'N'),
+            'FLAG_OWN_REALTY': np.where(i % 2 == 0, 'Y', 'N')
+        })
+        labels = ((i % 4) == 0).astype(np.int8)  # 25% default rate
         
         # Test preprocessing
         processed_kaggle = model.preprocess_kaggle_data(df)
-        print(f"✅ Kaggle data preprocessing: {processed_kaggle.shape}")
+        logger.info("✅ Kaggle data preprocessing: %s", processed_kaggle.shape)
         
         # Test feature extraction
         device_data = {
@@ -88,7 +112,7 @@ def test_ai_model():
         }
         
         device_features = model.extract_device_features(device_data)
-        print(f"✅ Device feature extraction: {len(device_features)} features")
+        logger.info("✅ Device feature extraction: %s features", len(device_features))
         
         # Test behavioral feature extraction
         alternative_data = {
@@ -105,15 +129,19 @@ def test_ai_model():
         }
         
         behavioral_features = model.extract_behavioral_features(alternative_data)
-        print(f"✅ Behavioral feature extraction: {len(behavioral_features)} features")
+        logger.info("✅ Behavioral feature extraction: %s features", len(behavioral_features))
+        
+        # Test schema-ordered feature vectorization
+        alternative_vector = model.vectorize_features(device_features, behavioral_features)
+        logger.info("✅ Feature vectorization: %s features (%s)", alternative_vector.shape[0], alternative_vector.dtype)
         
         # Test feature combination
         combined_features = model.combine_features(processed_kaggle, device_features, behavioral_features)
-        print(f"✅ Feature combination: {combined_features.shape}")
+        logger.info("✅ Feature combination: %s", combined_features.shape)
         
         # Test model training
-        model.fit(combined_features, pd.Series(labels))
-        print("✅ Model training successful")
+        model.fit(combined_features, labels)
+        logger.info("✅ Model training successful")
         
         # Test prediction
         test_sample = combined_features.iloc[[0]]
@@ -123,28 +151,26 @@ def test_ai_model():
             alternative_data=alternative_data
         )
         
-        print(f"✅ Prediction successful:")
-        print(f"   Risk Score: {prediction['risk_score']:.3f}")
-        print(f"   Risk Level: {prediction['risk_level']}")
-        print(f"   Confidence: {prediction['confidence']:.2%}")
+        logger.info("✅ Prediction successful:")
+        logger.info("   Risk Score: %.3f", prediction['risk_score'])
+        logger.info("   Risk Level: %s", prediction['risk_level'])
+        logger.info("   Confidence: %.2f%%", prediction['confidence'] * 100)
         
         return True
         
     except Exception as e:
-        print(f"❌ AI Model test failed: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ AI Model test failed: %s", e)
         return False
 
 async def test_data_collection_service():
     """Test the Automatic Data Collection Service."""
-    print("\n🧪 Testing Automatic Data Collection Service...")
+    logger.info("\n🧪 Testing Automatic Data Collection Service...")
     
     try:
         # Initialize service
         service = AutomaticDataCollectionService()
         await service.initialize_service()
-        print("✅ Service initialization successful")
+        logger.info("✅ Service initialization successful")
         
         # Test data collection
         device_profile = {
@@ -171,234 +197,413 @@ async def test_data_collection_service():
         }
         
         collected_data = await service.collect_comprehensive_data('test_user_001', device_profile)
-        print(f"✅ Data collection successful:")
-        print(f"   Quality Score: {collected_data['overall_quality_score']:.2f}/100")
-        print(f"   Status: {collected_data['collection_status']}")
-        print(f"   Data Sources: {len(collected_data['data_sources'])}")
+        logger.info("✅ Data collection successful:")
+        logger.info("   Quality Score: %.2f/100", collected_data['overall_quality_score'])
+        logger.info("   Status: %s", collected_data['collection_status'])
+        logger.info("   Data Sources: %s", len(collected_data['data_sources']))
         
         # Test AI assessment
         if service.ai_model.is_fitted:
             assessment = await service.perform_ai_risk_assessment(collected_data)
-            print(f"✅ AI assessment successful:")
-            print(f"   Risk Score: {assessment['risk_score']:.3f}")
-            print(f"   Risk Level: {assessment['risk_level']}")
-            print(f"   Confidence: {assessment['confidence']:.2%}")
+            logger.info("✅ AI assessment successful:")
+            logger.info("   Risk Score: %.3f", assessment['risk_score'])
+            logger.info("   Risk Level: %s", assessment['risk_level'])
+            logger.info("   Confidence: %.2f%%", assessment['confidence'] * 100)
         
         return True
         
     except Exception as e:
-        print(f"❌ Data Collection Service test failed: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Data Collection Service test failed: %s", e)
         return False
 
-def test_api_endpoints():
+async def test_api_endpoints(session: Optional[aiohttp.ClientSession] = None):
     """Test API endpoints."""
-    print("\n🧪 Testing API Endpoints...")
+    if session is None:
+        async with create_client_session() as session:
+            return await test_api_endpoints(session)
     
-    base_url = "http://localhost:8001"
+    logger.info("\n🧪 Testing API Endpoints...")
+    
+    base_url = API_BASE_URL
     
     try:
         # Test health endpoint
-        response = requests.get(f"{base_url}/health", timeout=5)
-        if response.status_code == 200:
-            print("✅ Health endpoint working")
-        else:
-            print(f"⚠️ Health endpoint returned {response.status_code}")
+        async with session.get(f"{base_url}/health", timeout=aiohttp.ClientTimeout(total=5)) as response:
+            if response.status == 200:
+                logger.info("✅ Health endpoint working")
+            else:
+                logger.info("⚠️ Health endpoint returned %s", response.status)
         
         # Test root endpoint
-        response = requests.get(f"{base_url}/", timeout=5)
-        if response.status_code == 200:
-            print("✅ Root endpoint working")
-        else:
-            print(f"⚠️ Root endpoint returned {response.status_code}")
+        async with session.get(f"{base_url}/", timeout=aiohttp.ClientTimeout(total=5)) as response:
+            if response.status == 200:
+                logger.info("✅ Root endpoint working")
+            else:
+                logger.info("⚠️ Root endpoint returned %s", response.status)
         
         # Test AI alternative data simulation endpoint
-        response = requests.post(
+        async with session.post(
             f"{base_url}/api/v1/ai-alternative-data/simulate-assessment",
             headers={"Content-Type": "application/json"},
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            result = response.json()
-            print("✅ AI Alternative Data simulation working")
-            print(f"   Risk Score: {result['risk_score']:.3f}")
-            print(f"   Risk Level: {result['risk_level']}")
-        else:
-            print(f"⚠️ AI simulation endpoint returned {response.status_code}")
-            print(f"   Response: {response.text}")
+            timeout=aiohttp.ClientTimeout(total=30)
+        ) as response:
+            if response.status == 200:
+                result = orjson.loads(await response.read())
+                logger.info("✅ AI Alternative Data simulation working")
+                logger.info("   Risk Score: %.3f", result['risk_score'])
+                logger.info("   Risk Level: %s", result['risk_level'])
+            else:
+                logger.info("⚠️ AI simulation endpoint returned %s", response.status)
+                logger.info("   Response: %s", await response.text())
         
         return True
         
-    except requests.exceptions.ConnectionError:
-        print("❌ Could not connect to API server")
-        print("   Make sure the backend server is running on http://localhost:8001")
+    except aiohttp.ClientConnectionError:
+        logger.error("❌ Could not connect to API server")
+        logger.info("   Make sure the backend server is running on %s", base_url)
         return False
     except Exception as e:
-        print(f"❌ API test failed: {e}")
+        logger.error("❌ API test failed: %s", e)
         return False
 
-def test_integration():
-    """Test end-to-end integration."""
-    print("\n🧪 Testing End-to-End Integration...")
+class InflightCoalescer:
+    """
+    Share one in-flight HTTP call between identical concurrent requests.
+    
+    Requests are keyed by method, URL, query parameters and a hash of the JSON
+    body; callers arriving while a matching request is in flight await its
+    result instead of issuing their own.
+    """
+    
+    def __init__(self):
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+    
+    async def request(self, session: aiohttp.ClientSession, method: str, url: str,
+                      params: Optional[Dict[str, Any]] = None, json: Any = None,
+                      **kwargs) -> Tuple[int, bytes]:
+        """Issue (or join) a request and return its status code and raw body."""
+        body = orjson.dumps(json, option=orjson.OPT_SORT_KEYS) if json is not None else b""
+        key = (method, url, tuple(sorted((params or {}).items())), hashlib.sha1(body).hexdigest())
+        
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._send(session, method, url, params, body, **kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        
+        return await asyncio.shield(task)
+    
+    async def _send(self, session, method, url, params, body, **kwargs) -> Tuple[int, bytes]:
+        headers = {"Content-Type": "application/json"} if body else None
+        async with session.request(method, url, params=params, data=body or None,
+                                   headers=headers, **kwargs) as response:
+            return response.status, await response.read()
+
+
+_assess_coalescer = InflightCoalescer()
+
+
+async def assess_batch(session: aiohttp.ClientSession, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Score several assessment requests with one call to the batch endpoint.
+    
+    Falls back to one /assess call per item if the server has no batch endpoint.
+    """
+    async with session.post(
+        f"{API_BASE_URL}/api/v1/ai-alternative-data/batch-assess",
+        json={"assessments": batch},
+        timeout=aiohttp.ClientTimeout(total=60)
+    ) as response:
+        if response.status != 404:
+            response.raise_for_status()
+            return orjson.loads(await response.read())["results"]
     
+    results = []
+    for item in batch:
+        status, body = await _assess_coalescer.request(
+            session, "POST", f"{API_BASE_URL}/api/v1/ai-alternative-data/assess",
+            json=item, timeout=aiohttp.ClientTimeout(total=30)
+        )
+        if status != 200:
+            raise RuntimeError(f"assess returned HTTP {status}")
+        results.append(orjson.loads(body))
+    return results
+
+
+class AssessmentBatcher:
+    """
+    Accumulate assessment requests and send them to the batch endpoint together.
+    
+    A batch is flushed once it holds max_batch items or max_wait seconds have
+    passed since its first item arrived.
+    """
+    
+    def __init__(self, session: aiohttp.ClientSession, max_batch: int = 64, max_wait: float = 0.05):
+        self.session = session
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+    
+    async def __aenter__(self) -> "AssessmentBatcher":
+        self._worker = asyncio.create_task(self._drain())
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            await self._queue.join()
+        self._worker.cancel()
+    
+    async def submit(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue one request and wait for its result."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+    
+    async def _drain(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            
+            while len(pending) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    pending.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            try:
+                results = await assess_batch(self.session, [item for item, _ in pending])
+                for (_, future), result in zip(pending, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+            finally:
+                for _ in pending:
+                    self._queue.task_done()
+
+async def warm_up_connection(session: aiohttp.ClientSession) -> None:
+    """Open a pooled keep-alive connection to the API before the tests start."""
     try:
-        # Create a complete test scenario
-        test_data = {
-            'applicant_data': {
-                'AMT_INCOME_TOTAL': 200000,
-                'AMT_CREDIT': 400000,
-                'AMT_ANNUITY': 20000,
-                'DAYS_BIRTH': -11000,
-                'DAYS_EMPLOYED': -2000,
-                'CNT_FAM_MEMBERS': 3,
-                'NAME_CONTRACT_TYPE': 'Cash loans',
-                'CODE_GENDER': 'M',
-                'FLAG_OWN_CAR': 'Y',
-                'FLAG_OWN_REALTY': 'Y'
-            },
-            'device_data': {
-                'device': {
-                    'model': 'iPhone 14',
-                    'platform': 'iOS',
-                    'systemVersion': '16.4',
-                    'isPinOrFingerprintSet': True,
-                    'totalMemory': 6442450944,
-                    'totalDiskCapacity': 128849018880,
-                    'isTablet': False
-                },
-                'network': {
-                    'type': 'wifi',
-                    'isConnected': True,
-                    'isInternetReachable': True,
-                    'details': {'isConnectionExpensive': False}
-                },
-                'riskFlags': {
-                    'isEmulator': False,
-                    'isRooted': False,
-                    'isJailbroken': False,
-                    'hasSecurityFeatures': True,
-                    'isDebuggingEnabled': False
-                },
-                'apps': {
-                    'totalCount': 15,
-                    'banking': ['SBI', 'ICICI', 'HDFC'],
-                    'investment': ['Zerodha', 'Groww'],
-                    'lending': []
-                }
-            },
-            'location_data': {
-                'currentCity': 'Mumbai',
-                'homeLocation': 'detected',
-                'workLocation': 'detected',
-                'travelPatterns': 'regular_commuter'
+        async with session.head(f"{API_BASE_URL}/health", timeout=aiohttp.ClientTimeout(total=5)):
+            pass
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        pass  # the API tests report the connection failure themselves
+
+def create_integration_test_data():
+    """Create a complete end-to-end assessment request payload."""
+    return {
+        'applicant_data': {
+            'AMT_INCOME_TOTAL': 200000,
+            'AMT_CREDIT': 400000,
+            'AMT_ANNUITY': 20000,
+            'DAYS_BIRTH': -11000,
+            'DAYS_EMPLOYED': -2000,
+            'CNT_FAM_MEMBERS': 3,
+            'NAME_CONTRACT_TYPE': 'Cash loans',
+            'CODE_GENDER': 'M',
+            'FLAG_OWN_CAR': 'Y',
+            'FLAG_OWN_REALTY': 'Y'
+        },
+        'device_data': {
+            'device': {
+                'model': 'iPhone 14',
+                'platform': 'iOS',
+                'systemVersion': '16.4',
+                'isPinOrFingerprintSet': True,
+                'totalMemory': 6442450944,
+                'totalDiskCapacity': 128849018880,
+                'isTablet': False
             },
-            'utility_data': {
-                'mobileRecharge': 'regular',
-                'electricityBill': 'consistent',
-                'internetUsage': 'high',
-                'subscriptionServices': 'multiple'
+            'network': {
+                'type': 'wifi',
+                'isConnected': True,
+                'isInternetReachable': True,
+                'details': {'isConnectionExpensive': False}
             },
-            'digital_footprint': {
-                'socialMediaPresence': 'professional',
-                'onlineActivity': 'regular',
-                'digitalIdentity': 'verified'
+            'riskFlags': {
+                'isEmulator': False,
+                'isRooted': False,
+                'isJailbroken': False,
+                'hasSecurityFeatures': True,
+                'isDebuggingEnabled': False
             },
-            'communication_data': {
-                'contactStability': 'high',
-                'communicationFrequency': 'regular'
+            'apps': {
+                'totalCount': 15,
+                'banking': ['SBI', 'ICICI', 'HDFC'],
+                'investment': ['Zerodha', 'Groww'],
+                'lending': []
             }
+        },
+        'location_data': {
+            'currentCity': 'Mumbai',
+            'homeLocation': 'detected',
+            'workLocation': 'detected',
+            'travelPatterns': 'regular_commuter'
+        },
+        'utility_data': {
+            'mobileRecharge': 'regular',
+            'electricityBill': 'consistent',
+            'internetUsage': 'high',
+            'subscriptionServices': 'multiple'
+        },
+        'digital_footprint': {
+            'socialMediaPresence': 'professional',
+            'onlineActivity': 'regular',
+            'digitalIdentity': 'verified'
+        },
+        'communication_data': {
+            'contactStability': 'high',
+            'communicationFrequency': 'regular'
         }
+    }
+
+async def test_integration(session: Optional[aiohttp.ClientSession] = None):
+    """Test end-to-end integration."""
+    if session is None:
+        async with create_client_session() as session:
+            return await test_integration(session)
+    
+    logger.info("\n🧪 Testing End-to-End Integration...")
+    
+    try:
+        # Create a complete test scenario
+        test_data = create_integration_test_data()
         
         # Test API call
-        response = requests.post(
-            "http://localhost:8001/api/v1/ai-alternative-data/assess",
-            json=test_data,
-            headers={"Content-Type": "application/json"},
-            timeout=30
+        status, body = await _assess_coalescer.request(
+            session, "POST", f"{API_BASE_URL}/api/v1/ai-alternative-data/assess",
+            json=test_data, timeout=aiohttp.ClientTimeout(total=30)
         )
         
-        if response.status_code == 200:
-            result = response.json()
-            print("✅ End-to-end integration successful")
-            print(f"   Risk Score: {result['risk_score']:.3f}")
-            print(f"   Risk Level: {result['risk_level']}")
-            print(f"   Confidence: {result['confidence']:.2%}")
-            print(f"   Processing Time: {result.get('processing_time_ms', 'N/A')}ms")
-            print(f"   Data Sources: {len(result.get('data_source_weights', {}))}")
+        if status == 200:
+            result = orjson.loads(body)
+            logger.info("✅ End-to-end integration successful")
+            logger.info("   Risk Score: %.3f", result['risk_score'])
+            logger.info("   Risk Level: %s", result['risk_level'])
+            logger.info("   Confidence: %.2f%%", result['confidence'] * 100)
+            logger.info("   Processing Time: %sms", result.get('processing_time_ms', 'N/A'))
+            logger.info("   Data Sources: %s", len(result.get('data_source_weights', {})))
             return True
         else:
-            print(f"❌ Integration test failed with status {response.status_code}")
-            print(f"   Response: {response.text}")
+            logger.error("❌ Integration test failed with status %s", status)
+            logger.info("   Response: %s", body.decode(errors='replace'))
             return False
             
     except Exception as e:
-        print(f"❌ Integration test failed: {e}")
+        logger.error("❌ Integration test failed: %s", e)
         return False
 
-async def run_all_tests():
-    """Run all tests."""
-    print("🚀 AI ALTERNATIVE DATA CREDIT RISK MODEL - TEST SUITE")
-    print("=" * 70)
-    
-    test_results = []
-    
-    # Test 1: AI Model
-    test_results.append(test_ai_model())
-    
-    # Test 2: Data Collection Service
-    test_results.append(await test_data_collection_service())
-    
-    # Test 3: API Endpoints
-    test_results.append(test_api_endpoints())
-    
-    # Test 4: Integration
-    test_results.append(test_integration())
-    
-    # Summary
-    print("\n" + "=" * 70)
-    print("📊 TEST SUMMARY")
-    print("=" * 70)
-    
-    passed = sum(test_results)
-    total = len(test_results)
-    
-    print(f"Tests Passed: {passed}/{total}")
-    print(f"Success Rate: {(passed/total)*100:.1f}%")
+async def test_batch_integration(session: Optional[aiohttp.ClientSession] = None, n_requests: int = 16):
+    """Test batched end-to-end assessments."""
+    if session is None:
+        async with create_client_session() as session:
+            return await test_batch_integration(session, n_requests)
     
-    test_names = [
-        "AI Model Testing",
-        "Data Collection Service",
-        "API Endpoints",
-        "End-to-End Integration"
-    ]
+    logger.info("\n🧪 Testing Batched Integration...")
     
-    for i, (name, result) in enumerate(zip(test_names, test_results)):
-        status = "✅ PASS" if result else "❌ FAIL"
-        print(f"{i+1}. {name}: {status}")
-    
-    if passed == total:
-        print("\n🎉 All tests passed! AI Alternative Data system is working correctly.")
-    else:
-        print(f"\n⚠️ {total - passed} test(s) failed. Please check the errors above.")
-    
-    return passed == total
+    try:
+        async with AssessmentBatcher(session) as batcher:
+            results = await asyncio.gather(*[
+                batcher.submit({**create_integration_test_data(), 'request_id': f"batch_req_{i}"})
+                for i in range(n_requests)
+            ])
+        
+        failed = [result for result in results if 'error' in result]
+        logger.info("✅ Batched integration: %s/%s assessments succeeded", len(results) - len(failed), len(results))
+        return not failed
+        
+    except Exception as e:
+        logger.error("❌ Batched integration test failed: %s", e)
+        return False
+
+def _run_and_flush(test_fn):
+    """Run a test in a worker process and flush its buffered output."""
+    try:
+        return test_fn()
+    finally:
+        _output_handler.flush()
+
+async def run_all_tests():
+    """Run all tests."""
+    try:
+        logger.info("🚀 AI ALTERNATIVE DATA CREDIT RISK MODEL - TEST SUITE")
+        logger.info("=" * 70)
+        
+        # The tests are independent, so run them concurrently; the
+        # CPU-bound model training runs in a separate process so it does not
+        # stall the event loop, and the two HTTP tests share one connection pool.
+        loop = asyncio.get_running_loop()
+        _output_handler.flush()  # don't hand buffered lines to the worker
+        with concurrent.futures.ProcessPoolExecutor(max_workers=1) as pool:
+            async with create_client_session() as session:
+                await warm_up_connection(session)
+                test_results = await asyncio.gather(
+                    loop.run_in_executor(pool, _run_and_flush, test_ai_model),
+                    test_data_collection_service(),
+                    test_api_endpoints(session),
+                    test_integration(session),
+                    test_batch_integration(session),
+                    return_exceptions=True
+                )
+        test_results = [result is True for result in test_results]
+        
+        # Summary
+        logger.info("\n" + "=" * 70)
+        logger.info("📊 TEST SUMMARY")
+        logger.info("=" * 70)
+        
+        passed = sum(test_results)
+        total = len(test_results)
+        
+        logger.info("Tests Passed: %s/%s", passed, total)
+        logger.info("Success Rate: %.1f%%", (passed/total)*100)
+        
+        test_names = [
+            "AI Model Testing",
+            "Data Collection Service",
+            "API Endpoints",
+            "End-to-End Integration",
+            "Batched Integration"
+        ]
+        
+        for i, (name, result) in enumerate(zip(test_names, test_results)):
+            status = "✅ PASS" if result else "❌ FAIL"
+            logger.info("%s. %s: %s", i+1, name, status)
+        
+        if passed == total:
+            logger.info("\n🎉 All tests passed! AI Alternative Data system is working correctly.")
+        else:
+            logger.info("\n⚠️ %s test(s) failed. Please check the errors above.", total - passed)
+        
+        return passed == total
+    finally:
+        _output_handler.flush()
 
 if __name__ == "__main__":
-    print("🧪 Starting AI Alternative Data Test Suite...")
-    print("Press Ctrl+C to interrupt")
-    print()
+    logger.info("🧪 Starting AI Alternative Data Test Suite...")
+    logger.info("Press Ctrl+C to interrupt")
+    logger.info("")
+    
+    # uvloop ships with uvicorn[standard] on non-Windows platforms
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
     
     try:
         success = asyncio.run(run_all_tests())
         exit_code = 0 if success else 1
         sys.exit(exit_code)
     except KeyboardInterrupt:
-        print("\n🛑 Tests interrupted by user")
+        logger.info("\n🛑 Tests interrupted by user")
         sys.exit(130)
     except Exception as e:
-        print(f"\n💥 Test suite crashed: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("\n💥 Test suite crashed: %s", e)
         sys.exit(1)
@@ -6,15 +6,23 @@ This script demonstrates how to use the BaseCollector abstract class
 and its concrete implementations: AccountAggregatorCollector and DeviceDataCollector.
 """
 
-import json
+import asyncio
+import orjson
 import sys
 import os
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 from datetime import datetime, timedelta
 
+from script_test_utils import buffered_stdout
+
 # Add the src directory to the path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
 try:
+    import data_processing.collectors as collectors_module
     from data_processing.collectors import (
         BaseCollector, AccountAggregatorCollector, DeviceDataCollector,
         DataSourceType, ConsentStatus, ConsentRequest, CollectionResult
@@ -38,7 +46,8 @@ def test_account_aggregator_collector():
         "api_base_url": "https://api.accountaggregator.example.com",
         "client_id": "test_client_123",
         "client_secret": "test_secret_456",
-        "consent_timeout": 300
+        "consent_timeout": 300,
+        "allow_force_grant": True
     }
     
     print("📋 Configuring Account Aggregator collector...")
@@ -59,9 +68,9 @@ def test_account_aggregator_collector():
     # Test consent initiation
     print(f"\n🤝 Testing consent flow...")
     user_id = "user_12345"
-    consent = aa_collector.initiate_consent(
+    consent = aa_collector.create_consent_request(
         user_id=user_id,
-        data_types=["bank_account", "credit_card"],
+        fi_types=["DEPOSIT", "CREDIT_CARD"],
         purpose="Credit Risk Assessment",
         duration_days=30
     )
@@ -72,39 +81,178 @@ def test_account_aggregator_collector():
     
     # Test consent status check
     print(f"\n🔄 Checking consent status...")
-    initial_status = aa_collector.check_consent_status(consent.consent_handle)
+    initial_status = aa_collector.get_consent_status(consent.consent_handle)
     print(f"   Initial Status: {initial_status.value}")
     
-    # Simulate waiting for consent approval
-    print(f"   ⏳ Simulating consent approval process...")
-    import time
-    time.sleep(2)  # Wait 2 seconds
+    # The example API host can't accept the request, so the consent comes back
+    # DENIED; force_grant must leave a final status alone
+    if consent.status != ConsentStatus.PENDING:
+        assert aa_collector.force_grant(consent.consent_handle) == consent.status
+        consent.status = ConsentStatus.PENDING  # as if the AA API had accepted it
+    
+    # Grant consent immediately so the data collection path is deterministic,
+    # waiting on the change notification rather than polling the status
+    print(f"   ✅ Granting consent for testing...")
+    
+    async def grant_and_wait():
+        granted = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        aa_collector.on_consent_change(
+            consent.consent_handle,
+            lambda status: status == ConsentStatus.GRANTED and loop.call_soon_threadsafe(granted.set)
+        )
+        aa_collector.force_grant(consent.consent_handle)
+        await asyncio.wait_for(granted.wait(), timeout=5)
     
-    updated_status = aa_collector.check_consent_status(consent.consent_handle)
-    print(f"   Updated Status: {updated_status.value}")
+    asyncio.run(grant_and_wait())
+    print(f"   Granted Status: {consent.status.value}")
+    assert consent.status == ConsentStatus.GRANTED
+    assert aa_collector.get_consent_status(consent.consent_handle) == ConsentStatus.GRANTED
     
     # Test data collection with consent
     print(f"\n📊 Testing data collection...")
-    if updated_status == ConsentStatus.GRANTED:
-        result = aa_collector.fetch_data(consent.consent_handle)
-        print(f"   Collection Success: {result.success}")
-        print(f"   Records Collected: {result.records_collected}")
-        
-        if result.data is not None:
-            print(f"   Data Sample:")
-            print(result.data.head(3).to_string(index=False))
-            print(f"   Data Shape: {result.data.shape}")
-    else:
-        print(f"   ⏳ Consent not yet granted, testing with collect_data method...")
-        
-        # Test the main collect_data method
-        result = aa_collector.collect_data(
-            user_id=user_id,
-            data_types=["bank_account"],
-            purpose="Credit Assessment"
+    fi_request = aa_collector.request_fi_data(consent.consent_handle)
+    print(f"   FI Request: {'✅ Initiated' if fi_request['success'] else '❌ ' + fi_request['error']}")
+    if not fi_request["success"]:
+        return
+    
+    result = aa_collector.fetch_fi_data(fi_request["session_id"])
+    print(f"   Collection Success: {result.success}")
+    print(f"   Records Collected: {result.records_collected}")
+    
+    if result.data is not None:
+        print(f"   Data Sample:")
+        print(result.data.head(3).to_string(index=False))
+        print(f"   Data Shape: {result.data.shape}")
+
+def _offline_aa_collector():
+    """AA collector pointed at an unreachable host, with force_grant enabled."""
+    aa_collector = AccountAggregatorCollector()
+    aa_collector.configure({
+        "api_base_url": "http://127.0.0.1:9",
+        "client_id": "test_client_123",
+        "client_secret": "test_secret_456",
+        "allow_force_grant": True
+    })
+    return aa_collector
+
+def test_consent_change_listeners():
+    """Test consent change callbacks and their cleanup."""
+    print("\n🔔 Testing consent change listeners")
+    print("=" * 60)
+    
+    aa_collector = _offline_aa_collector()
+    consent = aa_collector.create_consent_request(user_id="user_listener")
+    consent.status = ConsentStatus.PENDING  # as if the AA API had accepted it
+    
+    events = []
+    aa_collector.on_consent_change(consent.consent_handle, events.append)
+    unsubscribe = aa_collector.on_consent_change(
+        consent.consent_handle, lambda status: events.append(("removed", status))
+    )
+    unsubscribe()
+    
+    aa_collector.force_grant(consent.consent_handle)
+    print(f"   Events after grant: {[status.value for status in events]}")
+    assert events == [ConsentStatus.GRANTED]
+    
+    # GRANTED is final, so the listener is gone before the consent expires
+    consent.expires_at = datetime.now() - timedelta(seconds=1)
+    assert aa_collector.get_consent_status(consent.consent_handle) == ConsentStatus.EXPIRED
+    print(f"   Events after expiry: {[status.value for status in events]}")
+    assert events == [ConsentStatus.GRANTED]
+
+class _FakeClock:
+    """Stand-in for the time module: sleep() advances monotonic() instantly and is recorded."""
+    
+    def __init__(self, on_sleep=None):
+        self.now = 0.0
+        self.sleeps = []
+        self.on_sleep = on_sleep
+    
+    def monotonic(self):
+        return self.now
+    
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+        if self.on_sleep is not None:
+            self.on_sleep(len(self.sleeps))
+
+def test_wait_for_consent_backoff():
+    """Test that wait_for_consent polls with backoff and returns on a status change."""
+    print("\n⏳ Testing wait_for_consent backoff")
+    print("=" * 60)
+    
+    aa_collector = _offline_aa_collector()
+    
+    # A pending consent that is granted during the third sleep
+    consent = aa_collector.create_consent_request(user_id="user_waiting")
+    consent.status = ConsentStatus.PENDING
+    clock = _FakeClock(
+        on_sleep=lambda n: n == 3 and aa_collector.force_grant(consent.consent_handle)
+    )
+    with mock.patch.object(collectors_module, "time", clock):
+        status = aa_collector.wait_for_consent(
+            consent.consent_handle, timeout=5.0, initial_interval=0.05, max_interval=0.2
         )
-        print(f"   Collection Success: {result.success}")
-        print(f"   Metadata: {result.metadata}")
+    
+    print(f"   Granted after sleeps {clock.sleeps}")
+    assert status == ConsentStatus.GRANTED
+    assert np.allclose(clock.sleeps, [0.05, 0.1, 0.2])
+    
+    # A consent that stays pending times out, with sleeps that double up to
+    # max_interval and the last one trimmed to the remaining time
+    consent = aa_collector.create_consent_request(user_id="user_timeout")
+    consent.status = ConsentStatus.PENDING
+    clock = _FakeClock()
+    with mock.patch.object(collectors_module, "time", clock):
+        status = aa_collector.wait_for_consent(
+            consent.consent_handle, timeout=0.5, initial_interval=0.05, max_interval=0.2
+        )
+    
+    print(f"   Timed out after sleeps {clock.sleeps}")
+    assert status == ConsentStatus.PENDING
+    assert np.allclose(clock.sleeps, [0.05, 0.1, 0.2, 0.15])
+
+def generate_device_data_batch(sample, n_samples, seed=42):
+    """Build synthetic device records whose numeric location fields are drawn in bulk.
+    
+    Coordinates, accuracy and path distance are generated as NumPy arrays for
+    the whole batch and only converted to per-record dicts at the end.
+    """
+    rng = np.random.default_rng(seed)
+    timestamps = [point["timestamp"] for point in sample["location_data"]["locations"]]
+    n_points = len(timestamps)
+    
+    lat = rng.uniform(40.55, 40.90, size=(n_samples, n_points))
+    lon = rng.uniform(-74.25, -73.70, size=(n_samples, n_points))
+    accuracy = rng.uniform(5.0, 50.0, size=n_samples)
+    
+    # Equirectangular approximation of the path length between consecutive points
+    dlat = np.radians(np.diff(lat, axis=1))
+    dlon = np.radians(np.diff(lon, axis=1)) * np.cos(np.radians(lat[:, :-1]))
+    distance_km = 6371.0 * np.hypot(dlat, dlon).sum(axis=1)
+    
+    lat, lon = lat.round(4).tolist(), lon.round(4).tolist()
+    accuracy, distance_km = accuracy.round(1).tolist(), distance_km.round(2).tolist()
+    
+    return [
+        dict(
+            sample,
+            user_id=f"user_{i}",
+            location_data={
+                "locations": [
+                    {"lat": la, "lon": lo, "timestamp": ts}
+                    for la, lo, ts in zip(lat[i], lon[i], timestamps)
+                ],
+                "avg_accuracy": accuracy[i],
+                "places_visited": n_points,
+                "distance_km": distance_km[i]
+            }
+        )
+        for i in range(n_samples)
+    ]
 
 def test_device_data_collector():
     """Test the Device Data collector functionality."""
@@ -195,17 +343,30 @@ def test_device_data_collector():
     
     if result.data is not None:
         print(f"   Processed Data:")
-        for col in result.data.columns:
+        row = result.data.iloc[0].to_dict()
+        for col, value in row.items():
             if col not in ['user_id', 'collection_timestamp']:
-                value = result.data.iloc[0][col]
                 print(f"     {col}: {value}")
     
-    # Test with JSON string input
-    print(f"\n🔄 Testing with JSON string input...")
-    json_data = json.dumps(sample_device_data)
+    # Test with JSON document input
+    print(f"\n🔄 Testing with JSON document input...")
+    json_data = orjson.dumps(sample_device_data)
     json_result = device_collector.process_device_data(json_data)
     print(f"   JSON Processing Success: {json_result.success}")
     
+    # Test batch processing
+    n_samples = 10_000
+    print(f"\n📦 Testing batch processing of {n_samples} samples...")
+    batch = generate_device_data_batch(sample_device_data, n_samples)
+    started = time.perf_counter()
+    batch_result = device_collector.process_device_data_batch(batch)
+    elapsed = time.perf_counter() - started
+    print(f"   Batch Processing Success: {batch_result.success}")
+    print(f"   Records Processed: {batch_result.records_collected}")
+    print(f"   Throughput: {n_samples / elapsed:,.0f} records/s")
+    assert batch_result.records_collected == n_samples
+    assert batch_result.data.shape[0] == n_samples
+    
     # Test the main collect_data method
     print(f"\n📱 Testing collect_data method...")
     collect_result = device_collector.collect_data(
@@ -240,17 +401,29 @@ def main():
     print("🧪 Data Collectors Test Suite")
     print("=" * 70)
     
-    # Test data source types
-    test_data_source_types()
+    # The suites share no state, so run them concurrently to overlap their I/O waits;
+    # each one's output is buffered and printed in order afterwards
+    tests = [
+        test_data_source_types, test_account_aggregator_collector,
+        test_consent_change_listeners, test_wait_for_consent_backoff,
+        test_device_data_collector
+    ]
+    with buffered_stdout() as output:
+        with ThreadPoolExecutor(max_workers=len(tests)) as executor:
+            results = list(executor.map(output.capture, tests))
     
-    # Test Account Aggregator collector
-    test_account_aggregator_collector()
-    
-    # Test Device Data collector
-    test_device_data_collector()
+    failures = []
+    for test, (result, test_output) in zip(tests, results):
+        print(test_output, end="")
+        if isinstance(result, Exception):
+            print(f"❌ {test.__name__} failed: {result!r}")
+            failures.append(test.__name__)
     
     print(f"\n" + "=" * 70)
-    print("✅ All tests completed!")
+    if failures:
+        print(f"❌ {len(failures)} test(s) failed: {', '.join(failures)}")
+    else:
+        print("✅ All tests completed!")
     
     print(f"\n💡 Integration Notes:")
     print(f"   - Account Aggregator requires actual API credentials for production use")
@@ -7,19 +7,32 @@ all data sources when user provides consent.
 """
 
 import asyncio
-import json
-import requests
+import functools
+import sys
+import time
+import aiohttp
+import httpx
+import orjson
 from datetime import datetime, timedelta
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
+
+try:
+    import h2  # noqa: F401 - enables HTTP/2 support in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
 
 # Test data generation
-def generate_comprehensive_test_data() -> Dict[str, Any]:
-    """Generate realistic test data for all data sources"""
-    
-    current_time = datetime.now()
-    
+_BASE_TEMPLATE: Dict[str, Any] = {
+    "user_id": "test_user_12345",
     # 1. Digital Footprint Data
-    digital_footprint = {
+    "digital_footprint": {
         "device_usage": {
             "deviceAge": {
                 "daysSinceFirstInstall": 245,
@@ -38,7 +51,6 @@ def generate_comprehensive_test_data() -> Dict[str, Any]:
                 "peakUsageTime": "evening"
             },
             "usageTimePatterns": {
-                "currentHour": current_time.hour,
                 "typicalUsageWindow": "9am-11pm",
                 "weekendUsage": "moderate"
             }
@@ -72,12 +84,11 @@ def generate_comprehensive_test_data() -> Dict[str, Any]:
                 "secureStorageUsed": True
             }
         },
-        "collected_at": current_time.isoformat(),
         "data_source": "digital_footprint"
-    }
+    },
     
     # 2. Utility & Service Data
-    utility_data = {
+    "utility_data": {
         "connectivity_patterns": {
             "currentConnection": {
                 "type": "wifi",
@@ -109,17 +120,15 @@ def generate_comprehensive_test_data() -> Dict[str, Any]:
             "paymentRegularity": "excellent",
             "subscriptionChurn": "low"
         },
-        "collected_at": current_time.isoformat(),
         "data_source": "utility_service"
-    }
+    },
     
     # 3. Location & Mobility Data
-    location_data = {
+    "location_data": {
         "current_location": {
             "latitude": 12.97,  # Coarse coordinates (Bangalore area)
             "longitude": 77.59,
             "accuracy": 1500,  # Coarse accuracy (≥1km)
-            "timestamp": int(current_time.timestamp() * 1000),
             "accuracyLevel": "coarse"
         },
         "mobility_patterns": {
@@ -140,12 +149,11 @@ def generate_comprehensive_test_data() -> Dict[str, Any]:
             "serviceQuality": "excellent",
             "regionalCoverage": "full"
         },
-        "collected_at": current_time.isoformat(),
         "data_source": "location_mobility"
-    }
+    },
     
     # 4. Device & Technical Data
-    device_data = {
+    "device_data": {
         "hardware_profile": {
             "device": {
                 "brand": "Samsung",
@@ -197,112 +205,302 @@ def generate_comprehensive_test_data() -> Dict[str, Any]:
             "isDebuggingEnabled": False,
             "suspiciousAppsDetected": False
         },
-        "collected_at": current_time.isoformat(),
         "data_source": "device_technical"
+    },
+    "metadata": {
+        "collection_time_ms": 1250,
+        "data_version": "2.0.0",
+        "collection_source": "comprehensive_auto_collector"
     }
+}
+
+def _with_timestamps(now: datetime) -> Dict[str, Any]:
+    """Overlay the time-dependent fields for ``now`` onto the base template"""
+    iso = now.isoformat()
+    ts_ms = int(now.timestamp() * 1000)
+    base = _BASE_TEMPLATE
+    digital_footprint = base["digital_footprint"]
+    device_usage = digital_footprint["device_usage"]
+    location_data = base["location_data"]
     
-    # Complete comprehensive data request
-    comprehensive_data = {
-        "user_id": "test_user_12345",
-        "digital_footprint": digital_footprint,
-        "utility_data": utility_data,
-        "location_data": location_data,
-        "device_data": device_data,
-        "metadata": {
-            "collection_timestamp": current_time.isoformat(),
-            "collection_time_ms": 1250,
-            "data_version": "2.0.0",
-            "collection_source": "comprehensive_auto_collector"
+    return {
+        **base,
+        "digital_footprint": {
+            **digital_footprint,
+            "device_usage": {
+                **device_usage,
+                "usageTimePatterns": {
+                    **device_usage["usageTimePatterns"],
+                    "currentHour": now.hour
+                }
+            },
+            "collected_at": iso
         },
-        "consent_timestamp": (current_time - timedelta(minutes=5)).isoformat()
+        "utility_data": {**base["utility_data"], "collected_at": iso},
+        "location_data": {
+            **location_data,
+            "current_location": {
+                **location_data["current_location"],
+                "timestamp": ts_ms
+            },
+            "collected_at": iso
+        },
+        "device_data": {**base["device_data"], "collected_at": iso},
+        "metadata": {**base["metadata"], "collection_timestamp": iso},
+        "consent_timestamp": (now - timedelta(minutes=5)).isoformat()
     }
+
+@functools.lru_cache(maxsize=1)
+def _cached_test_data(epoch_minute: int) -> Dict[str, Any]:
+    return _with_timestamps(datetime.fromtimestamp(epoch_minute * 60))
+
+def generate_comprehensive_test_data() -> Dict[str, Any]:
+    """Generate realistic test data for all data sources
     
-    return comprehensive_data
+    The payload is built once per wall-clock minute and shared between
+    callers, so treat it as read-only.
+    """
+    # Keying on the integer epoch minute keeps cache hits free of datetime work
+    return _cached_test_data(time.time_ns() // 60_000_000_000)
 
-def test_comprehensive_data_collection():
-    """Test the comprehensive data collection endpoint"""
+def generate_batch_test_data(batch_size: int, test_data: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Generate payloads for batch_size synthetic users sharing one data template"""
+    if test_data is None:
+        test_data = generate_comprehensive_test_data()
+    return [test_data] + [
+        dict(test_data, user_id=f"{test_data['user_id']}_{i}")
+        for i in range(1, batch_size)
+    ]
+
+BASE_URL = "http://localhost:8000"
+
+BATCH_SIZE = 16
+
+STREAM_USERS = 32
+
+RISK_REPORT_TEMPLATE = (
+    "\n🛡️ RISK ASSESSMENT RESULTS:\n"
+    "   Overall Risk Score: {overall_risk_score}/100\n"
+    "   Risk Level: {risk_level}\n"
+    "\n📊 Risk Breakdown:\n"
+    "   📱 Digital Footprint: {digital_footprint_risk}/100\n"
+    "   🔐 Device Security: {device_security_risk}/100\n"
+    "   📍 Location Stability: {location_stability_risk}/100\n"
+    "   📈 Behavior Patterns: {behavior_pattern_risk}/100\n"
+)
+
+RISK_LIST_SECTIONS = [
+    ("⚠️ Risk Factors", "risk_factors"),
+    ("✅ Positive Indicators", "positive_indicators"),
+    ("💡 Recommendations", "recommendations")
+]
+
+CONSENT_TYPES = [
+    "digital_footprint",
+    "location_mobility",
+    "device_technical",
+    "utility_service"
+]
+
+def create_client_session() -> aiohttp.ClientSession:
+    """Create one keep-alive session whose connection pool is shared by every request"""
+    connector = aiohttp.TCPConnector(limit=32, limit_per_host=16, keepalive_timeout=60)
+    return aiohttp.ClientSession(connector=connector)
+
+async def upload(session: aiohttp.ClientSession, data: Dict[str, Any]) -> Tuple[int, Any]:
+    """Upload one comprehensive data payload, returning (status, body)"""
+    async with session.post(
+        f"{BASE_URL}/comprehensive-data/upload",
+        data=orjson.dumps(data),
+        headers={"Content-Type": "application/json"}
+    ) as response:
+        if response.status == 200:
+            return response.status, await response.json()
+        return response.status, await response.text()
+
+async def iter_json_array(payloads: List[Dict[str, Any]]):
+    """Yield a JSON array one encoded element at a time"""
+    yield b"["
+    for i, payload in enumerate(payloads):
+        yield (b"," if i else b"") + orjson.dumps(payload)
+    yield b"]"
+
+async def iter_zstd(chunks, level: int = 3):
+    """Compress an async stream of byte chunks into a single zstd frame"""
+    compressor = zstandard.ZstdCompressor(level=level).compressobj()
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+async def upload_batch(session: aiohttp.ClientSession, payloads: List[Dict[str, Any]]) -> Tuple[int, Any]:
+    """Upload many users' payloads in one request, returning (status, body)
+    
+    The body is streamed with chunked transfer encoding, so the full batch
+    is never serialized into a single buffer. When zstandard is installed the
+    stream is zstd-compressed on the fly.
+    """
+    body = iter_json_array(payloads)
+    headers = {"Content-Type": "application/json"}
+    if ZSTD_AVAILABLE:
+        body = iter_zstd(body)
+        headers["Content-Encoding"] = "zstd"
+    
+    async with session.post(
+        f"{BASE_URL}/comprehensive-data/upload:batch",
+        data=body,
+        headers=headers
+    ) as response:
+        if response.status == 200:
+            return response.status, await response.json()
+        return response.status, await response.text()
+
+async def stream_uploads(session: aiohttp.ClientSession, n_users: int, maxsize: int = 4) -> List[int]:
+    """Upload n_users payloads through a bounded queue, returning their HTTP statuses
+    
+    A producer builds payloads while the consumer uploads them, so payload
+    generation overlaps the network round-trips and at most maxsize payloads
+    are held in memory.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+    statuses = []
+    
+    async def producer():
+        for i in range(n_users):
+            test_data = generate_comprehensive_test_data()
+            await queue.put(dict(test_data, user_id=f"{test_data['user_id']}_stream_{i}"))
+        await queue.put(None)
+    
+    async def consumer():
+        while True:
+            payload = await queue.get()
+            if payload is None:
+                break
+            status, _ = await upload(session, payload)
+            statuses.append(status)
+    
+    await asyncio.gather(producer(), consumer())
+    return statuses
+
+async def upload_multiplexed(payloads: List[Dict[str, Any]]) -> List[int]:
+    """Upload payloads concurrently over one httpx client, returning their HTTP statuses
+    
+    With h2 installed and an HTTP/2 capable server (e.g. hypercorn over TLS)
+    every upload is multiplexed on a single connection; otherwise httpx uses
+    its pooled HTTP/1.1 connections.
+    """
+    async with httpx.AsyncClient(http2=HTTP2_AVAILABLE, base_url=BASE_URL) as client:
+        responses = await asyncio.gather(*[
+            client.post(
+                "/comprehensive-data/upload",
+                content=orjson.dumps(payload),
+                headers={"Content-Type": "application/json"}
+            )
+            for payload in payloads
+        ])
+    return [response.status_code for response in responses]
+
+async def grant_consent(session: aiohttp.ClientSession, user_id: str, consent_types: List[str]) -> int:
+    """Grant comprehensive data consent for a user, returning the HTTP status"""
+    async with session.post(
+        f"{BASE_URL}/comprehensive-data/consent/grant",
+        params={
+            "user_id": user_id,
+            "consent_types": orjson.dumps(consent_types).decode(),
+            "consent_timestamp": datetime.now().isoformat()
+        }
+    ) as response:
+        return response.status
+
+async def run_tests(num_concurrent: int = 1, test_data: Optional[Dict[str, Any]] = None):
+    """Run the comprehensive data collection test for num_concurrent synthetic users"""
     
     print("🤖 COMPREHENSIVE AUTOMATIC DATA COLLECTION TEST")
     print("=" * 60)
     
-    # API endpoint
-    BASE_URL = "http://localhost:8000"
-    
     try:
         # Test 1: Generate comprehensive test data
         print("\n1. 📊 Generating comprehensive test data...")
-        test_data = generate_comprehensive_test_data()
+        if test_data is None:
+            test_data = generate_comprehensive_test_data()
         print(f"✅ Generated data for user: {test_data['user_id']}")
         print(f"   Data sources: {len([k for k in test_data.keys() if k.endswith('_data')])}")
         print(f"   Collection time: {test_data['metadata']['collection_time_ms']}ms")
         
-        # Test 2: Upload comprehensive data
-        print("\n2. 📤 Uploading comprehensive data...")
-        response = requests.post(
-            f"{BASE_URL}/comprehensive-data/upload",
-            json=test_data,
-            headers={"Content-Type": "application/json"}
-        )
+        # Additional synthetic users share the payload under their own ids
+        payloads = generate_batch_test_data(num_concurrent, test_data)
         
-        if response.status_code == 200:
-            result = response.json()
+        # Test 2 & 3: Upload comprehensive data and grant consent concurrently
+        print(f"\n2. 📤 Uploading comprehensive data for {num_concurrent} user(s)...")
+        print("\n3. 📝 Testing consent management...")
+        started = time.perf_counter()
+        async with create_client_session() as session:
+            *upload_results, consent_status = await asyncio.gather(
+                *(upload(session, payload) for payload in payloads),
+                grant_consent(session, test_data['user_id'], CONSENT_TYPES)
+            )
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            
+            # Batched upload: one request carries BATCH_SIZE users
+            started = time.perf_counter()
+            batch_status, batch_result = await upload_batch(session, generate_batch_test_data(BATCH_SIZE))
+            batch_elapsed_ms = (time.perf_counter() - started) * 1000
+            
+            # Streamed uploads: payloads are produced while earlier ones upload
+            started = time.perf_counter()
+            stream_statuses = await stream_uploads(session, STREAM_USERS)
+            stream_elapsed_ms = (time.perf_counter() - started) * 1000
+        
+        # Multiplexed uploads: every user on one HTTP/2 connection when available
+        started = time.perf_counter()
+        multiplexed_statuses = await upload_multiplexed(payloads)
+        multiplexed_elapsed_ms = (time.perf_counter() - started) * 1000
+        
+        status_code, result = upload_results[0]
+        if status_code == 200:
             print("✅ Data uploaded successfully!")
             print(f"   Processing time: {result['processing_time_ms']}ms")
             
             # Display risk assessment
             if result.get('risk_assessment'):
                 risk = result['risk_assessment']
-                print(f"\n🛡️ RISK ASSESSMENT RESULTS:")
-                print(f"   Overall Risk Score: {risk['overall_risk_score']}/100")
-                print(f"   Risk Level: {get_risk_level(risk['overall_risk_score'])}")
-                
-                print(f"\n📊 Risk Breakdown:")
-                print(f"   📱 Digital Footprint: {risk['digital_footprint_risk']}/100")
-                print(f"   🔐 Device Security: {risk['device_security_risk']}/100")
-                print(f"   📍 Location Stability: {risk['location_stability_risk']}/100")
-                print(f"   📈 Behavior Patterns: {risk['behavior_pattern_risk']}/100")
-                
-                if risk.get('risk_factors'):
-                    print(f"\n⚠️ Risk Factors:")
-                    for factor in risk['risk_factors']:
-                        print(f"   • {factor}")
-                
-                if risk.get('positive_indicators'):
-                    print(f"\n✅ Positive Indicators:")
-                    for indicator in risk['positive_indicators']:
-                        print(f"   • {indicator}")
-                
-                if risk.get('recommendations'):
-                    print(f"\n💡 Recommendations:")
-                    for recommendation in risk['recommendations']:
-                        print(f"   • {recommendation}")
+                report = RISK_REPORT_TEMPLATE.format_map({
+                    **risk,
+                    "risk_level": get_risk_level(risk['overall_risk_score'])
+                })
+                report += "".join(
+                    f"\n{title}:\n" + "".join(f"   • {item}\n" for item in risk[key])
+                    for title, key in RISK_LIST_SECTIONS
+                    if risk.get(key)
+                )
+                sys.stdout.write(report)
                         
         else:
-            print(f"❌ Upload failed: {response.status_code}")
-            print(f"   Error: {response.text}")
-        
-        # Test 3: Test consent management
-        print("\n3. 📝 Testing consent management...")
+            print(f"❌ Upload failed: {status_code}")
+            print(f"   Error: {result}")
         
-        # Grant consent
-        consent_response = requests.post(
-            f"{BASE_URL}/comprehensive-data/consent/grant",
-            params={
-                "user_id": test_data['user_id'],
-                "consent_types": json.dumps([
-                    "digital_footprint", 
-                    "location_mobility", 
-                    "device_technical", 
-                    "utility_service"
-                ]),
-                "consent_timestamp": datetime.now().isoformat()
-            }
-        )
+        succeeded = sum(1 for status, _ in upload_results if status == 200)
+        print(f"   Concurrent uploads: {succeeded}/{num_concurrent} succeeded in {elapsed_ms:.0f}ms")
         
-        if consent_response.status_code == 200:
+        if consent_status == 200:
             print("✅ Consent granted successfully")
         else:
-            print(f"❌ Consent grant failed: {consent_response.status_code}")
+            print(f"❌ Consent grant failed: {consent_status}")
+        
+        if batch_status == 200:
+            print(f"✅ Batch upload: {batch_result['successful_uploads']}/{BATCH_SIZE} users "
+                  f"in one request ({batch_elapsed_ms:.0f}ms)")
+        else:
+            print(f"❌ Batch upload failed: {batch_status}")
+        
+        streamed = sum(1 for status in stream_statuses if status == 200)
+        print(f"   Streamed uploads: {streamed}/{STREAM_USERS} succeeded in {stream_elapsed_ms:.0f}ms")
+        
+        multiplexed = sum(1 for status in multiplexed_statuses if status == 200)
+        protocol = "HTTP/2" if HTTP2_AVAILABLE else "HTTP/1.1"
+        print(f"   Multiplexed uploads ({protocol}): {multiplexed}/{num_concurrent} "
+              f"succeeded in {multiplexed_elapsed_ms:.0f}ms")
         
         # Test 4: Data quality assessment
         print("\n4. 🔍 Data Quality Assessment:")
@@ -330,12 +528,16 @@ def test_comprehensive_data_collection():
         print(f"   Real-time risk assessment: ✅")
         print(f"   Privacy compliance: ✅")
         
-    except requests.exceptions.ConnectionError:
+    except (aiohttp.ClientConnectionError, httpx.ConnectError):
         print("❌ Error: Could not connect to API server")
         print("   Make sure the FastAPI server is running on http://localhost:8000")
     except Exception as e:
         print(f"❌ Error during testing: {str(e)}")
 
+def test_comprehensive_data_collection(test_data: Optional[Dict[str, Any]] = None):
+    """Test the comprehensive data collection endpoint"""
+    asyncio.run(run_tests(test_data=test_data))
+
 def get_risk_level(score: int) -> str:
     """Get risk level from score"""
     if score <= 39:
@@ -345,14 +547,47 @@ def get_risk_level(score: int) -> str:
     else:
         return "🔴 High Risk"
 
-def test_individual_data_sources():
+async def analyze(source_name: str, source_data: Dict[str, Any]) -> List[str]:
+    """Analyze one data source, returning its report lines"""
+    lines = []
+    lines.append(f"\n📊 {source_name} Analysis:")
+    
+    if source_name == "Digital Footprint":
+        lines.append(f"   Device Age: {source_data['device_usage']['deviceAge']['daysSinceFirstInstall']} days")
+        lines.append(f"   Ownership Stability: {source_data['device_usage']['deviceAge']['ownershipStability']}")
+        lines.append(f"   Biometric Security: {'✅' if source_data['security_profile']['biometricEnabled'] else '❌'}")
+        lines.append(f"   Emulator Detected: {'❌' if source_data['security_profile']['isEmulator'] else '✅'}")
+        
+    elif source_name == "Location Data":
+        if source_data['current_location']:
+            lines.append(f"   Location Accuracy: {source_data['current_location']['accuracy']}m (Coarse)")
+            lines.append(f"   Location Stability: {source_data['location_stability']['stabilityScore']}/100")
+            lines.append(f"   Service Availability: {source_data['service_availability']['serviceQuality']}")
+        
+    elif source_name == "Device Data":
+        hw = source_data['hardware_profile']
+        lines.append(f"   Device: {hw['device']['brand']} {hw['device']['model']}")
+        lines.append(f"   Memory: {hw['performance']['totalMemory'] // (1024**3)}GB")
+        lines.append(f"   Biometric Support: {'✅' if hw['capabilities']['supportsBiometric'] else '❌'}")
+        lines.append(f"   Security Risk: {'✅ Low' if not any(source_data['risk_indicators'].values()) else '⚠️ Medium'}")
+        
+    elif source_name == "Utility Data":
+        conn = source_data['connectivity_patterns']
+        lines.append(f"   Connection Quality: {conn['currentConnection']['quality']}")
+        lines.append(f"   Connection Stability: {conn['patterns']['connectionStability']}/100")
+        lines.append(f"   Payment Reliability: {source_data['payment_method_profile']['paymentReliability']}")
+    
+    return lines
+
+def test_individual_data_sources(test_data: Optional[Dict[str, Any]] = None):
     """Test individual data source processing"""
     
     print("\n" + "=" * 60)
     print("🔍 INDIVIDUAL DATA SOURCE ANALYSIS")
     print("=" * 60)
     
-    test_data = generate_comprehensive_test_data()
+    if test_data is None:
+        test_data = generate_comprehensive_test_data()
     
     # Test each data source
     data_sources = {
@@ -362,42 +597,24 @@ def test_individual_data_sources():
         "Device Data": test_data['device_data']
     }
     
-    for source_name, source_data in data_sources.items():
-        print(f"\n📊 {source_name} Analysis:")
-        
-        if source_name == "Digital Footprint":
-            print(f"   Device Age: {source_data['device_usage']['deviceAge']['daysSinceFirstInstall']} days")
-            print(f"   Ownership Stability: {source_data['device_usage']['deviceAge']['ownershipStability']}")
-            print(f"   Biometric Security: {'✅' if source_data['security_profile']['biometricEnabled'] else '❌'}")
-            print(f"   Emulator Detected: {'❌' if source_data['security_profile']['isEmulator'] else '✅'}")
-            
-        elif source_name == "Location Data":
-            if source_data['current_location']:
-                print(f"   Location Accuracy: {source_data['current_location']['accuracy']}m (Coarse)")
-                print(f"   Location Stability: {source_data['location_stability']['stabilityScore']}/100")
-                print(f"   Service Availability: {source_data['service_availability']['serviceQuality']}")
-            
-        elif source_name == "Device Data":
-            hw = source_data['hardware_profile']
-            print(f"   Device: {hw['device']['brand']} {hw['device']['model']}")
-            print(f"   Memory: {hw['performance']['totalMemory'] // (1024**3)}GB")
-            print(f"   Biometric Support: {'✅' if hw['capabilities']['supportsBiometric'] else '❌'}")
-            print(f"   Security Risk: {'✅ Low' if not any(source_data['risk_indicators'].values()) else '⚠️ Medium'}")
-            
-        elif source_name == "Utility Data":
-            conn = source_data['connectivity_patterns']
-            print(f"   Connection Quality: {conn['currentConnection']['quality']}")
-            print(f"   Connection Stability: {conn['patterns']['connectionStability']}/100")
-            print(f"   Payment Reliability: {source_data['payment_method_profile']['paymentReliability']}")
+    async def analyze_all():
+        return await asyncio.gather(*[analyze(n, d) for n, d in data_sources.items()])
+    
+    # Reports are printed in source order once every analysis has finished
+    for lines in asyncio.run(analyze_all()):
+        print("\n".join(lines))
 
 if __name__ == "__main__":
     print("🚀 STARTING COMPREHENSIVE DATA COLLECTION TESTS...")
     
+    # Both tests share one generated payload
+    shared = generate_comprehensive_test_data()
+    
     # Run main test
-    test_comprehensive_data_collection()
+    test_comprehensive_data_collection(shared)
     
     # Run detailed analysis
-    test_individual_data_sources()
+    test_individual_data_sources(shared)
     
     print("\n" + "=" * 60)
     print("✅ ALL TESTS COMPLETED!")
@@ -5,20 +5,29 @@ This script shows how to use the new create_digital_footprint_features method
 to engineer features from digital transaction data.
 """
 
+import hashlib
 import pandas as pd
 import numpy as np
+import sys
+from pathlib import Path
 from datetime import datetime, timedelta
 from src.data_processing.feature_engineering import FeatureEngineer
 
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
 # Create sample main dataframe (simulating credit application data)
-np.random.seed(42)
+rng = np.random.default_rng(42)
 n_customers = 100
 
 main_df = pd.DataFrame({
     'SK_ID_CURR': range(1, n_customers + 1),
-    'AMT_INCOME_TOTAL': np.random.normal(200000, 50000, n_customers),
-    'AMT_CREDIT': np.random.normal(500000, 100000, n_customers),
-    'TARGET': np.random.binomial(1, 0.1, n_customers)  # 10% default rate
+    'AMT_INCOME_TOTAL': rng.normal(200000, 50000, n_customers),
+    'AMT_CREDIT': rng.normal(500000, 100000, n_customers),
+    'TARGET': rng.binomial(1, 0.1, n_customers)  # 10% default rate
 })
 
 # Create sample digital transaction data
@@ -27,7 +36,7 @@ transaction_dates = pd.date_range(
     start='2023-01-01', 
     end='2023-12-31', 
     periods=n_transactions
-)
+).to_numpy()  # plain datetime64[ns] array, sampled by position below
 
 # Define transaction categories
 essential_categories = [
@@ -40,12 +49,26 @@ discretionary_categories = [
 ]
 all_categories = essential_categories + discretionary_categories
 
-digital_data = pd.DataFrame({
-    'user_id': np.random.randint(1, n_customers + 1, n_transactions),
-    'transaction_date': np.random.choice(transaction_dates, n_transactions),
-    'amount': np.random.exponential(1000, n_transactions),  # Exponential distribution for amounts
-    'category': np.random.choice(all_categories, n_transactions)
-})
+# Generated transactions are cached on disk per (seed, size, script version);
+# pass --no-cache to regenerate. The version is a hash of this file, so any edit
+# to the generator invalidates old cache entries.
+generator_version = hashlib.sha1(Path(__file__).read_bytes()).hexdigest()[:12]
+cache_path = (Path(__file__).resolve().parent / ".cache"
+              / f"digital_seed42_c{n_customers}_t{n_transactions}_{generator_version}.pkl")
+if "--no-cache" not in sys.argv[1:] and cache_path.exists():
+    digital_data = pd.read_pickle(cache_path)
+else:
+    digital_data = pd.DataFrame({
+        'user_id': rng.integers(1, n_customers + 1, n_transactions),
+        'transaction_date': transaction_dates[rng.integers(0, n_transactions, n_transactions)],
+        'amount': rng.exponential(1000, n_transactions),  # Exponential distribution for amounts
+        'category': rng.choice(all_categories, n_transactions)
+    })
+
+    # Stable category codes, so grouping works on small ints instead of strings
+    digital_data['category'] = digital_data['category'].astype(pd.CategoricalDtype(categories=all_categories))
+    cache_path.parent.mkdir(exist_ok=True)
+    digital_data.to_pickle(cache_path)
 
 # Remove some users to simulate customers without digital transaction data
 digital_data = digital_data[digital_data['user_id'] <= 80]  # Only 80% have digital data
@@ -107,16 +130,24 @@ try:
     
     # Show correlation with target variable
     print("\nCorrelation with TARGET variable:")
-    correlations = []
-    for feature in key_features:
-        if feature in enhanced_df.columns:
-            corr = enhanced_df[feature].corr(enhanced_df['TARGET'])
-            correlations.append((feature, corr))
-            print(f"  {feature}: {corr:.4f}")
+    present_features = [f for f in key_features if f in enhanced_df.columns]
+    assert present_features == key_features, f"missing features: {set(key_features) - set(present_features)}"
+    correlations = enhanced_df[present_features + ['TARGET']].corr()['TARGET'].drop('TARGET')
+    assert correlations.notna().all(), "correlation with TARGET is undefined"
+    for feature, corr in correlations.items():
+        print(f"  {feature}: {corr:.4f}")
     
-    # Save results
-    output_file = "enhanced_data_with_digital_features.csv"
-    enhanced_df.to_csv(output_file, index=False)
+    # Save results; scoring features don't need float64 precision on disk
+    float_cols = [f for f in digital_features
+                  if f in enhanced_df.columns and enhanced_df[f].dtype == np.float64]
+    enhanced_df[float_cols] = enhanced_df[float_cols].astype(np.float32)
+    if PYARROW_AVAILABLE:
+        output_file = "enhanced_data_with_digital_features.parquet"
+        enhanced_df.to_parquet(output_file, engine="pyarrow", compression="zstd",
+                               index=False, use_dictionary=True)
+    else:
+        output_file = "enhanced_data_with_digital_features.csv"
+        enhanced_df.to_csv(output_file, index=False)
     print(f"\nEnhanced data saved to: {output_file}")
     
     print("\n" + "="*60)
@@ -127,3 +158,4 @@ except Exception as e:
     print(f"Error creating digital footprint features: {e}")
     import traceback
     traceback.print_exc()
+    raise
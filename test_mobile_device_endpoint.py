@@ -6,13 +6,29 @@ This script tests the POST /upload-device-data endpoint with sample
 React Native device data to ensure proper validation and processing.
 """
 
-import requests
-import json
-from datetime import datetime, timedelta
-import sys
+import asyncio
+import httpx
+import copy
+import orjson
+from datetime import datetime, timedelta, timezone
+
+from script_test_utils import buffered_stdout, create_async_client, run_with_client
 
 # API base URL
 API_BASE_URL = "http://localhost:8000"
+UPLOAD_PATH = "/data-collection/upload-device-data"
+
+def _encode(payload):
+    """Encode a request payload with orjson; UTC datetimes are written with a Z suffix."""
+    return orjson.dumps(payload, option=orjson.OPT_UTC_Z)
+
+def _decode(response):
+    """Decode a response body once, straight from its raw bytes."""
+    return orjson.loads(response.content)
+
+def _run_with_client(check):
+    """Run a single async check on its own client."""
+    return run_with_client(check, API_BASE_URL)
 
 def create_sample_mobile_device_data():
     """Create sample mobile device data that matches the schema."""
@@ -20,7 +36,7 @@ def create_sample_mobile_device_data():
     # Simulate data that would come from React Native DeviceAnalytics.js
     device_data = {
         "user_id": "test_user_12345",
-        "collection_timestamp": datetime.utcnow().isoformat() + "Z",
+        "collection_timestamp": datetime.now(timezone.utc),
         "profile_version": "1.0.0",
         "collection_time_ms": 1250,
         
@@ -75,7 +91,7 @@ def create_sample_mobile_device_data():
             "latitude": 28.61,  # Coarse location (Delhi)
             "longitude": 77.21,
             "accuracy": 1000.0,  # 1km accuracy
-            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "timestamp": datetime.now(timezone.utc),
             "source": "geolocation_service"
         },
         
@@ -98,18 +114,18 @@ def create_sample_mobile_device_data():
     
     return device_data
 
-def test_mobile_device_upload():
-    """Test the mobile device data upload endpoint."""
+# Sample device data built once; tests that modify it work on a deep copy
+_BASE_DEVICE_DATA = create_sample_mobile_device_data()
+
+# The unmodified sample is always sent as-is, so its request body is encoded once too
+_SAMPLE_UPLOAD_BODY = _encode({"device_data": _BASE_DEVICE_DATA})
+
+async def mobile_device_upload(client):
+    """Upload sample data to the mobile device data endpoint."""
     print("🧪 Testing Mobile Device Data Upload Endpoint")
     print("=" * 60)
     
-    # Create sample data
-    device_data = create_sample_mobile_device_data()
-    
-    # Create request payload
-    request_payload = {
-        "device_data": device_data
-    }
+    device_data = _BASE_DEVICE_DATA
     
     print(f"📱 Testing with device data for user: {device_data['user_id']}")
     print(f"   Device: {device_data['device_info']['brand']} {device_data['device_info']['model']}")
@@ -119,19 +135,14 @@ def test_mobile_device_upload():
     
     try:
         # Send POST request
-        print(f"\n🚀 Sending POST request to {API_BASE_URL}/data-collection/upload-device-data")
+        print(f"\n🚀 Sending POST request to {API_BASE_URL}{UPLOAD_PATH}")
         
-        response = requests.post(
-            f"{API_BASE_URL}/data-collection/upload-device-data",
-            json=request_payload,
-            headers={"Content-Type": "application/json"},
-            timeout=10
-        )
+        response = await client.post(UPLOAD_PATH, content=_SAMPLE_UPLOAD_BODY, timeout=10)
         
         print(f"   Status Code: {response.status_code}")
         
         if response.status_code == 200:
-            result = response.json()
+            result = _decode(response)
             print(f"✅ Success! Device data uploaded successfully")
             print(f"   Message: {result.get('message')}")
             print(f"   User ID: {result.get('user_id')}")
@@ -152,25 +163,25 @@ def test_mobile_device_upload():
         else:
             print(f"❌ Request failed with status {response.status_code}")
             try:
-                error_detail = response.json()
+                error_detail = _decode(response)
                 print(f"   Error: {error_detail}")
-            except:
+            except orjson.JSONDecodeError:
                 print(f"   Error: {response.text}")
             return False
             
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         print(f"❌ Connection failed - Is the API server running?")
         print(f"   Start the server with: python -m uvicorn src.api.main:app --reload")
         return False
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         print(f"❌ Request timed out")
         return False
     except Exception as e:
         print(f"❌ Unexpected error: {e}")
         return False
 
-def test_validation_errors():
-    """Test validation error handling."""
+async def validation_errors(client):
+    """Check validation error handling."""
     print(f"\n🧪 Testing Validation Error Handling")
     print("-" * 50)
     
@@ -197,21 +208,16 @@ def test_validation_errors():
     }
     
     try:
-        response = requests.post(
-            f"{API_BASE_URL}/data-collection/upload-device-data",
-            json=invalid_data,
-            headers={"Content-Type": "application/json"},
-            timeout=5
-        )
+        response = await client.post(UPLOAD_PATH, content=_encode(invalid_data), timeout=5)
         
         print(f"   Status Code: {response.status_code}")
         
         if response.status_code == 422:
             print(f"✅ Validation error correctly caught")
             try:
-                error_detail = response.json()
+                error_detail = _decode(response)
                 print(f"   Validation errors: {len(error_detail.get('detail', []))}")
-            except:
+            except orjson.JSONDecodeError:
                 print(f"   Error response: {response.text[:200]}")
         else:
             print(f"❌ Expected validation error (422), got {response.status_code}")
@@ -219,13 +225,13 @@ def test_validation_errors():
     except Exception as e:
         print(f"❌ Error testing validation: {e}")
 
-def test_high_risk_device():
-    """Test with high-risk device profile."""
+async def high_risk_device(client):
+    """Upload a high-risk device profile."""
     print(f"\n🧪 Testing High-Risk Device Profile")
     print("-" * 50)
     
     # Create high-risk device data
-    device_data = create_sample_mobile_device_data()
+    device_data = copy.deepcopy(_BASE_DEVICE_DATA)
     
     # Modify to be high-risk
     device_data["device_info"]["is_emulator"] = True
@@ -237,15 +243,10 @@ def test_high_risk_device():
     request_payload = {"device_data": device_data}
     
     try:
-        response = requests.post(
-            f"{API_BASE_URL}/data-collection/upload-device-data",
-            json=request_payload,
-            headers={"Content-Type": "application/json"},
-            timeout=10
-        )
+        response = await client.post(UPLOAD_PATH, content=_encode(request_payload), timeout=10)
         
         if response.status_code == 200:
-            result = response.json()
+            result = _decode(response)
             risk_assessment = result.get('risk_assessment', {})
             risk_score = risk_assessment.get('risk_score', 0)
             risk_level = risk_assessment.get('risk_level', 'unknown')
@@ -264,19 +265,41 @@ def test_high_risk_device():
     except Exception as e:
         print(f"❌ Error testing high-risk device: {e}")
 
+def test_mobile_device_upload():
+    """Test the mobile device data upload endpoint."""
+    return _run_with_client(mobile_device_upload)
+
+def test_validation_errors():
+    """Test validation error handling."""
+    return _run_with_client(validation_errors)
+
+def test_high_risk_device():
+    """Test with high-risk device profile."""
+    return _run_with_client(high_risk_device)
+
+async def main_async():
+    """Run the three endpoint checks concurrently over one client."""
+    checks = [
+        mobile_device_upload,  # Test 1: Normal device data upload
+        validation_errors,     # Test 2: Validation error handling
+        high_risk_device       # Test 3: High-risk device
+    ]
+    with buffered_stdout() as output:
+        async with create_async_client(API_BASE_URL) as client:
+            results = await asyncio.gather(*(output.capture_async(check, client) for check in checks))
+    
+    for _, check_output in results:
+        print(check_output, end="")
+    return [result for result, _ in results]
+
 def main():
     """Run all tests."""
     print("🚀 Mobile Device Data Upload Endpoint Tests")
     print("=" * 60)
     
-    # Test 1: Normal device data upload
-    success1 = test_mobile_device_upload()
-    
-    # Test 2: Validation error handling
-    test_validation_errors()
-    
-    # Test 3: High-risk device
-    test_high_risk_device()
+    success1, _, _ = asyncio.run(main_async())
+    if isinstance(success1, Exception):
+        success1 = False
     
     print(f"\n" + "=" * 60)
     if success1: